@@ -0,0 +1,102 @@
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+# Разделитель нескольких допустимых ответов в поле correct_answer
+ANSWER_SEPARATOR = "|"
+
+NUMBER_RE = re.compile(r"^[+-]?(\d+([.,]\d*)?|[.,]\d+)$")
+THOUSANDS_RE = re.compile(r"^[+-]?\d{1,3}( \d{3})+([.,]\d*)?$")
+
+
+def canonical_number(text):
+    """Каноническая запись числа ("+3,50" -> "3.5") или None, если это не число"""
+    if not NUMBER_RE.match(text):
+        return None
+    try:
+        value = Decimal(text.replace(",", "."))
+    except InvalidOperation:
+        return None
+    if value == 0:
+        return "0"
+    text = format(value.normalize(), "f")
+    return text.rstrip("0").rstrip(".") if "." in text else text
+
+
+def normalize_answer(text):
+    """Нормализованная форма ответа: NFKC, casefold, ё→е, схлопнутые пробелы, числа"""
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    text = " ".join(text.split())
+    number = canonical_number(text.replace(" ", "") if THOUSANDS_RE.match(text) else text)
+    return number if number is not None else text
+
+
+def split_answers(correct_answer):
+    """Список допустимых ответов из поля correct_answer"""
+    return [part.strip() for part in correct_answer.split(ANSWER_SEPARATOR) if part.strip()]
+
+
+def within_distance(first, second, limit):
+    """Не превышает ли расстояние Левенштейна между строками limit (полоса шириной 2*limit+1)"""
+    if abs(len(first) - len(second)) > limit:
+        return False
+    if first == second:
+        return True
+    if len(first) > len(second):
+        first, second = second, first
+    previous = list(range(len(second) + 1))
+    for i, char in enumerate(first, 1):
+        low, high = max(1, i - limit), min(len(second), i + limit)
+        current = [i] + [limit + 1] * len(second)
+        for j in range(low, high + 1):
+            cost = 0 if char == second[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if min(current[low - 1:high + 1]) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+class AnswerKey:
+    """Ключ ответа на один вопрос с заранее нормализованными вариантами."""
+
+    __slots__ = ("display", "accepted", "fuzzy", "tolerance")
+
+    def __init__(self, correct_answer, tolerance=0):
+        answers = split_answers(correct_answer) or [correct_answer]
+        self.display = " / ".join(answers)
+        self.accepted = frozenset(normalize_answer(answer) for answer in answers)
+        # Опечатки допускаются только в словесных ответах: числа сравниваются точно
+        self.fuzzy = tuple(accepted for accepted in self.accepted if canonical_number(accepted) is None)
+        self.tolerance = tolerance or 0
+
+    def matches_normalized(self, normalized):
+        """Проверка уже нормализованного ответа"""
+        if normalized in self.accepted:
+            return True
+        if self.tolerance <= 0 or canonical_number(normalized) is not None:
+            return False
+        return any(within_distance(normalized, accepted, self.tolerance) for accepted in self.fuzzy)
+
+    def matches(self, answer):
+        return self.matches_normalized(normalize_answer(answer))
+
+
+class AnswerIndex:
+    """Ключи ответов для набора вопросов, построенные один раз при загрузке.
+
+    Строки вопросов — (id, question, correct_answer[, tolerance]).
+    """
+
+    def __init__(self, questions):
+        self.keys = {}
+        for row in questions:
+            self.keys[row[0]] = AnswerKey(row[2], row[3] if len(row) > 3 else 0)
+
+    def __getitem__(self, question_id):
+        return self.keys[question_id]
+
+    def check(self, question_id, answer):
+        """Проверка ответа; возвращает (верно ли, нормализованная форма)"""
+        normalized = normalize_answer(answer)
+        return self.keys[question_id].matches_normalized(normalized), normalized
@@ -0,0 +1,79 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+
+from database import Database
+from question_bank import import_file, export_file
+
+
+def generate_questions(count):
+    """count различных вопросов: (question, correct_answer, tolerance)"""
+    for number in range(count):
+        yield f"Сколько будет {number} + {number}?", str(number * 2), 0
+
+
+def generate_csv(path, count):
+    """Файл с count различными вопросами"""
+    with open(path, "w", newline="", encoding="utf-8") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(("question", "correct_answer", "tolerance"))
+        writer.writerows(generate_questions(count))
+
+
+def bench_per_row(path, csv_path, count):
+    """Прежний путь: insert_question по одной строке с фиксацией каждой вставки"""
+    database = Database(path)
+    started = time.perf_counter()
+    with open(csv_path, newline="", encoding="utf-8") as stream:
+        reader = csv.DictReader(stream)
+        for number, row in enumerate(reader):
+            if number >= count:
+                break
+            database.insert_question(row["question"], row["correct_answer"])
+            database.flush()
+    elapsed = time.perf_counter() - started
+    database.close()
+    return elapsed
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Скорость потокового импорта банка вопросов")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--baseline-rows", type=int, default=10000,
+                        help="сколько строк вставить прежним построчным способом (0 — пропустить)")
+    parser.add_argument("--dir", default=None, help="каталог для временных файлов (по умолчанию системный)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        csv_path = os.path.join(directory, "bank.csv")
+        generate_csv(csv_path, args.rows)
+
+        database = Database(os.path.join(directory, "quiz.db"))
+        (read, inserted), elapsed = timed(import_file, database, csv_path, show_progress=False)
+        print(f"Импорт: {inserted} из {read} за {elapsed:.2f} с, {read / elapsed:,.0f} строк/с")
+        (read, inserted), elapsed = timed(import_file, database, csv_path, show_progress=False)
+        print(f"Повторный импорт (все дубликаты): добавлено {inserted}, {elapsed:.2f} с, {read / elapsed:,.0f} строк/с")
+        count, elapsed = timed(export_file, database, os.path.join(directory, "bank.jsonl"), show_progress=False)
+        print(f"Экспорт в JSON Lines: {count} за {elapsed:.2f} с, {count / elapsed:,.0f} строк/с")
+        database.close()
+
+        if args.baseline_rows:
+            count = min(args.baseline_rows, args.rows)
+            elapsed = bench_per_row(os.path.join(directory, "per_row.db"), csv_path, count)
+            print(f"Построчно через insert_question: {count} за {elapsed:.2f} с, {count / elapsed:,.0f} строк/с")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+
+from database import ResultsDatabase
+
+
+def bench_per_row_commit(path, count):
+    """Прежний путь: журнал отката и commit() после каждой строки"""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=DELETE")
+    connection.execute("PRAGMA synchronous=FULL")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            score INTEGER NOT NULL
+        )
+    """)
+    cursor = connection.cursor()
+    started = time.perf_counter()
+    for number in range(count):
+        cursor.execute("INSERT INTO results (name, score) VALUES (?, ?)", (f"Ученик {number}", number % 11))
+        connection.commit()
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed
+
+
+def bench_write_behind(path, count):
+    """Новый путь: WAL и групповая фиксация через журнал отложенной записи"""
+    results_database = ResultsDatabase(path)
+    started = time.perf_counter()
+    for number in range(count):
+        results_database.insert_result(f"Ученик {number}", number % 11)
+    results_database.flush()
+    elapsed = time.perf_counter() - started
+    results_database.close()
+    return elapsed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Скорость вставки результатов: построчно и пачками")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dir", default=None, help="каталог для временных баз (по умолчанию системный)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"{'строк':>8} {'построчно, ст/с':>18} {'пачками, ст/с':>16} {'ускорение':>10}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for count in args.sizes:
+            per_row = bench_per_row_commit(os.path.join(directory, f"per_row_{count}.db"), count)
+            batched = bench_write_behind(os.path.join(directory, f"batched_{count}.db"), count)
+            print(f"{count:>8} {count / per_row:>18.0f} {count / batched:>16.0f} {per_row / batched:>9.1f}x")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+from database import ResultsDatabase
+from answer_index import AnswerKey, normalize_answer
+
+QUESTION_ID = 1
+VARIANTS = ["42", "42,0", "сорок два", "сорок  два", "Сорок Два", "сорак два", "43", "не знаю", "4 2", "42.00"]
+
+
+def seed(results_database, count, seed_value=0, question_count=1, student_count=None):
+    """Заполнение базы: count результатов по одному ответу.
+
+    При question_count=1 все ответы даны на вопрос QUESTION_ID, иначе на
+    случайные вопросы с id от 1 до question_count. Учеников student_count
+    (по умолчанию у каждого результата свой).
+    """
+    student_count = student_count or count
+    rng = random.Random(seed_value)
+    initial_key = AnswerKey("42")
+    rows = []
+    for number in range(count):
+        answer = rng.choice(VARIANTS) if number % 10 else f"вариант {number % 5000}"
+        normalized = normalize_answer(answer)
+        question_id = QUESTION_ID if question_count == 1 else rng.randint(1, question_count)
+        rows.append((str(number), f"Ученик {number % student_count}", question_id, answer, normalized,
+                     int(initial_key.matches_normalized(normalized)), rng.uniform(1, 30)))
+    with results_database.pool.connection() as connection:
+        connection.executemany(
+            "INSERT INTO results (name, score, session_id, total) VALUES (?, ?, ?, 1)",
+            ((row[1], row[5], row[0]) for row in rows))
+        connection.executemany("""
+            INSERT INTO answers (session_id, name, question_id, answer, normalized, correct, response_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        connection.commit()
+
+
+def regrade_per_row(results_database, question_id, answer_key):
+    """Прежний подход: цикл по строкам с проверкой и обновлением каждой"""
+    with results_database.pool.connection() as connection:
+        rows = connection.execute("SELECT id, session_id, answer, correct FROM answers WHERE question_id = ?",
+                                  (question_id,)).fetchall()
+        changed = 0
+        for answer_id, session_id, answer, correct in rows:
+            new_correct = int(answer_key.matches(answer))
+            if new_correct != correct:
+                connection.execute("UPDATE answers SET correct = ? WHERE id = ?", (new_correct, answer_id))
+                connection.execute("UPDATE results SET score = score + ? WHERE session_id = ?",
+                                   (new_correct - correct, session_id))
+                changed += 1
+        connection.commit()
+        return changed
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Пересчёт сохранённых ответов после изменения ключа")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--no-baseline", action="store_true", help="не запускать построчный пересчёт")
+    parser.add_argument("--dir", default=None, help="каталог для временных баз (по умолчанию системный)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        results_database = ResultsDatabase(os.path.join(directory, "results.db"))
+        _, elapsed = timed(seed, results_database, args.rows)
+        print(f"Заполнение: {args.rows} ответов за {elapsed:.2f} с")
+
+        steps = [
+            ("несколько вариантов", AnswerKey("42 | сорок два")),
+            ("допуск 1 опечатка", AnswerKey("42 | сорок два", 1)),
+            ("возврат к одному ответу", AnswerKey("42")),
+        ]
+        for title, answer_key in steps:
+            changed, elapsed = timed(results_database.regrade_question, QUESTION_ID, answer_key)
+            print(f"Пакетный пересчёт ({title}): изменено {changed}, {elapsed:.2f} с, "
+                  f"{args.rows / elapsed:,.0f} ответов/с")
+
+        if not args.no_baseline:
+            changed, elapsed = timed(regrade_per_row, results_database, QUESTION_ID, steps[1][1])
+            print(f"Построчный пересчёт: изменено {changed}, {elapsed:.2f} с, {args.rows / elapsed:,.0f} ответов/с")
+        results_database.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+from database import Database, search_expression
+
+SYLLABLES = ["ка", "ло", "ре", "ми", "ста", "но", "ви", "ёл", "пра", "до", "лу", "же", "тро", "са", "ни", "ку",
+             "бе", "гра", "зо", "ты", "че", "ша", "вля", "ме", "пу", "ско", "тё", "ра", "ди", "го", "ле", "сну",
+             "кри", "бо", "фе", "жи", "ма", "ру", "хо", "щи"]
+
+
+def make_vocabulary(rng, size):
+    """Набор различных «слов» из слогов, в том числе с буквой ё"""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def generate_questions(count, vocabulary, seed_value=0):
+    rng = random.Random(seed_value)
+    for number in range(count):
+        words = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(4, 9)))
+        yield f"Вопрос {number}: {words}?", rng.choice(vocabulary), 0
+
+
+def search_like(database, text, limit):
+    """Прежний способ: LIKE '%…%' по каждому слову с полным просмотром таблицы"""
+    words = text.split()
+    condition = " AND ".join("question LIKE ?" for _ in words)
+    with database.pool.connection() as connection:
+        return connection.execute(
+            f"SELECT id, question, correct_answer, tolerance FROM questions WHERE {condition} LIMIT ?",
+            [f"%{word}%" for word in words] + [limit]).fetchall()
+
+
+def measure(function, queries):
+    """Время каждого запроса в миллисекундах, по возрастанию"""
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        function(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+
+def report(title, timings):
+    median = timings[len(timings) // 2]
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{title}: медиана {median:.2f} мс, p95 {p95:.2f} мс, максимум {timings[-1]:.2f} мс")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Полнотекстовый поиск по банку вопросов против LIKE")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--vocabulary", type=int, default=20000, help="число различных слов")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=200, help="сколько результатов показывает окно")
+    parser.add_argument("--dir", default=None, help="каталог для временной базы (по умолчанию системный)")
+    return parser.parse_args(argv)
+
+
+def make_queries(rng, vocabulary, count):
+    """Наборы запросов по видам: (название, запросы).
+
+    Обычные — начала редких слов от трёх букв, как при наборе. Частые содержат
+    слово «вопрос», которое есть в каждом вопросе банка, отдельно или вместе с
+    редким словом. Короткие — префиксы из двух букв и одна буква (она не
+    участвует в поиске, запрос пустой).
+    """
+    typical = []
+    for _ in range(count):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 2))]
+        typical.append(" ".join(word[:rng.randint(3, len(word))] for word in words))
+    common = ["вопрос", "вопро"] + [f"вопрос {query}" for query in typical[:count // 10]]
+    short = [word[:2] for word in rng.sample(vocabulary, count // 10)] + ["в", "к"]
+    return [("обычные", typical), ("частое слово", common), ("короткие префиксы", short)]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(1)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    query_sets = make_queries(rng, vocabulary, args.queries)
+    queries = query_sets[0][1]
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        database = Database(os.path.join(directory, "quiz.db"))
+        started = time.perf_counter()
+        _, inserted = database.import_questions(generate_questions(args.rows, vocabulary))
+        elapsed = time.perf_counter() - started
+        print(f"Импорт с индексом поиска: {inserted} вопросов за {elapsed:.2f} с, {inserted / elapsed:,.0f} строк/с")
+
+        database.search_questions(queries[0], args.limit)  # Прогрев кеша страниц
+        found = sum(len(database.search_questions(query, args.limit)) for query in queries)
+        print(f"Запросов: {len(queries)}, например {queries[0]!r} -> {search_expression(queries[0])}, "
+              f"найдено строк всего {found}")
+        for title, query_set in query_sets:
+            report(f"FTS5, {title} ({len(query_set)})",
+                   measure(lambda query: database.search_questions(query, args.limit), query_set))
+        report("LIKE '%…%'", measure(lambda query: search_like(database, query, args.limit), queries[:20]))
+        database.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
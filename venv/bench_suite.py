@@ -0,0 +1,224 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")  # Окна создаются и рисуются без экрана
+
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import tempfile
+import statistics
+
+from PyQt6.QtWidgets import QApplication
+
+import test1
+import instrumentation
+from database import Database, ResultsDatabase
+from bench_import import generate_questions
+from bench_regrade import seed as seed_results
+
+QUIZ_QUESTIONS = 20
+
+
+class SilentMessageBox:
+    """Замена QMessageBox в окнах на время замеров: модальные сообщения не ждут нажатия"""
+
+    @staticmethod
+    def information(*args, **kwargs):
+        return None
+
+    warning = critical = information
+
+
+def dispose(window):
+    window.close()
+    window.deleteLater()
+    QApplication.processEvents()
+
+
+class Suite:
+    """Замеры одной базы заданного размера; каждый случай — метод без аргументов."""
+
+    CASES = ["insert_questions", "insert_results", "questions_page", "results_page", "summary", "search",
+             "search_common", "sample", "teacher_window", "results_window", "quiz_run"]
+
+    def __init__(self, database, results_database, size):
+        self.database = database
+        self.results_database = results_database
+        self.size = size
+        self.rng = random.Random(size)
+        self.inserted = 0
+
+    def insert_questions(self):
+        """100 вопросов через журнал отложенной записи и ожидание фиксации"""
+        for _ in range(100):
+            self.inserted += 1
+            self.database.insert_question(f"Новый вопрос {self.inserted}", str(self.inserted))
+        self.database.flush()
+
+    def insert_results(self):
+        """100 результатов по 5 ответов через журнал и ожидание фиксации"""
+        for number in range(100):
+            session_id = f"bench-{self.inserted}-{number}"
+            self.results_database.insert_result("Замер", 3, session_id, 5)
+            self.results_database.insert_answers(session_id, "Замер", [(1, "42", "42", True, 2.0)] * 5)
+        self.results_database.flush()
+
+    def questions_page(self):
+        self.database.get_questions_page(self.rng.randrange(self.size), 200)
+
+    def results_page(self):
+        self.results_database.get_results_page(0, 200)
+
+    def summary(self):
+        self.results_database.get_summary()
+
+    def search(self):
+        """Поиск по числу из текста вопроса: совпадений немного"""
+        self.database.search_questions(str(self.rng.randrange(self.size)))
+
+    def search_common(self):
+        """Худший случай поиска: одно из слов есть в каждом вопросе банка"""
+        self.database.search_questions(f"сколько {self.rng.randrange(self.size)}")
+
+    def sample(self):
+        self.database.sample_questions(QUIZ_QUESTIONS, self.rng.randrange(2 ** 31))
+
+    def teacher_window(self):
+        window = test1.TeacherWindow(self.database, self.results_database, None)
+        window.grab()  # Синхронная отрисовка окна
+        dispose(window)
+
+    def results_window(self):
+        window = test1.ResultsWindow(self.database, self.results_database, None)
+        window.grab()
+        dispose(window)
+
+    def quiz_run(self):
+        """Вариант из QUIZ_QUESTIONS вопросов: открытие окна, все ответы с отрисовкой, сохранение"""
+        main_window = test1.QuizApp(self.database, self.results_database)
+        window = test1.StudentWindow(self.database, self.results_database, main_window, 600, "Замер",
+                                     QUIZ_QUESTIONS)
+        window.grab()
+        session = window.session
+        while not window.quiz_ended:
+            window.answer_input.setText(session.questions[session.current_question_index][2])
+            window.check_answer()
+            window.grab()
+        self.results_database.flush()
+        dispose(window)
+        dispose(main_window)
+
+
+def measure(function, repeat):
+    """Медиана и минимум repeat вызовов после одного прогревочного (первые импорты, кеш страниц)"""
+    function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "min_ms": round(min(timings), 3)}
+
+
+def run_size(directory, size, repeat):
+    """Заполнение баз на size строк и замер всех случаев; возвращает {случай: замер}"""
+    database = Database(os.path.join(directory, f"quiz_{size}.db"))
+    results_database = ResultsDatabase(os.path.join(directory, f"results_{size}.db"))
+    timings = {}
+
+    started = time.perf_counter()
+    database.import_questions(generate_questions(size))
+    timings["seed_questions"] = {"median_ms": round((time.perf_counter() - started) * 1000, 3)}
+    started = time.perf_counter()
+    seed_results(results_database, size, question_count=size, student_count=max(1, size // 10))
+    timings["seed_results"] = {"median_ms": round((time.perf_counter() - started) * 1000, 3)}
+    print(f"{size} строк: заполнение вопросов {timings['seed_questions']['median_ms'] / 1000:.1f} с, "
+          f"результатов {timings['seed_results']['median_ms'] / 1000:.1f} с", flush=True)
+
+    suite = Suite(database, results_database, size)
+    for case in Suite.CASES:
+        timings[case] = measure(getattr(suite, case), repeat)
+        print(f"  {case}: медиана {timings[case]['median_ms']:.2f} мс, минимум {timings[case]['min_ms']:.2f} мс",
+              flush=True)
+    database.close()
+    results_database.close()
+    return timings
+
+
+def best(timing):
+    """Минимум повторов меньше всего зависит от посторонней нагрузки на машину"""
+    return timing.get("min_ms", timing["median_ms"])
+
+
+def compare(results, baseline, threshold, min_difference):
+    """Сравнение с сохранённым замером; возвращает число замедлений больше threshold раз"""
+    regressions = 0
+    for size, cases in results.items():
+        for case, timing in cases.items():
+            previous = baseline.get(size, {}).get(case)
+            if not previous or not best(previous):
+                continue
+            ratio = best(timing) / best(previous)
+            slower = ratio > threshold and best(timing) - best(previous) > min_difference
+            regressions += slower
+            mark = "  <-- медленнее" if slower else ""
+            print(f"{size:>8} {case:<17} {best(previous):>10.2f} -> {best(timing):>10.2f} мс "
+                  f"(x{ratio:.2f}){mark}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры баз данных и окон без экрана (QT_QPA_PLATFORM=offscreen)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="число вопросов и результатов в базах")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов каждого замера")
+    parser.add_argument("--save-baseline", metavar="FILE", help="сохранить замеры как базовые")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="сравнить с сохранёнными базовыми замерами; эталонные лежат в bench_baseline.json "
+                             "рядом со скриптом (машина, на которой они сняты, записана в самом файле)")
+    parser.add_argument("--threshold", type=float, default=1.5, help="во сколько раз медленнее считать регрессией")
+    parser.add_argument("--min-difference", type=float, default=2.0,
+                        help="разница в мс, меньше которой замедление не учитывается")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="сохранить гистограммы вызовов баз данных и слотов (замеры тогда включают обёртки)")
+    parser.add_argument("--dir", default=None, help="каталог для временных баз (по умолчанию системный)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app = QApplication(sys.argv[:1])
+    test1.QMessageBox = SilentMessageBox
+    if args.metrics:
+        test1.install_instrumentation()
+
+    results = {}
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for size in args.sizes:
+            results[str(size)] = run_size(directory, size, args.repeat)
+
+    if args.metrics:
+        instrumentation.metrics.save(args.metrics)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as stream:
+            json.dump({"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                       "platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count(),
+                       "results": results}, stream, ensure_ascii=False, indent=2)
+        print(f"Базовые замеры сохранены в {args.save_baseline}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as stream:
+            baseline = json.load(stream)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_difference)
+        print(f"Замедлений: {regressions}")
+        app.quit()
+        return 1 if regressions else 0
+    app.quit()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1314 @@
+import re
+import sys
+import time
+import queue
+import atexit
+import random
+import hashlib
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import chain, groupby, islice
+from contextlib import contextmanager
+from collections import OrderedDict
+
+# WAL позволяет читать во время записи, а synchronous=NORMAL в режиме WAL
+# делает fsync только при контрольной точке, а не при каждой фиксации.
+DEFAULT_PRAGMAS = ("journal_mode=WAL", "synchronous=NORMAL", "busy_timeout=5000")
+
+# Полнотекстовый индекс вопросов. unicode61 не различает регистр и для
+# кириллицы, а ё→е делается прямо в триггерах, чтобы «елка» находила «ёлка».
+# prefix='2 3' ускоряет короткие префиксные запросы при наборе текста.
+# Массовый импорт выключает триггер вставки флагом в questions_fts_state и
+# заполняет индекс одним запросом: построчно через триггер втрое медленнее.
+SEARCH_FOLD_SQL = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+SEARCH_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+        question, correct_answer,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS questions_fts_state (deferred INTEGER NOT NULL)",
+    "INSERT INTO questions_fts_state (deferred) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM questions_fts_state)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions
+    WHEN (SELECT deferred FROM questions_fts_state) = 0 BEGIN
+        INSERT INTO questions_fts (rowid, question, correct_answer)
+        VALUES (NEW.id, {SEARCH_FOLD_SQL.format("NEW.question")}, {SEARCH_FOLD_SQL.format("NEW.correct_answer")});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+        DELETE FROM questions_fts WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS questions_fts_update AFTER UPDATE OF question, correct_answer ON questions BEGIN
+        DELETE FROM questions_fts WHERE rowid = OLD.id;
+        INSERT INTO questions_fts (rowid, question, correct_answer)
+        VALUES (NEW.id, {SEARCH_FOLD_SQL.format("NEW.question")}, {SEARCH_FOLD_SQL.format("NEW.correct_answer")});
+    END
+    """,
+]
+
+# Больше скольких совпадений поиск не ранжирует по bm25. Ранжирование стоит
+# около 1,5 мкс на совпадение, и для частого префикса («ка») на сотнях тысяч
+# вопросов занимает сотни миллисекунд. Запрос с большим числом совпадений
+# возвращает самые новые из них без ранжирования, пока текст не уточнён.
+SEARCH_RANK_LIMIT = 5000
+
+# Слова короче двух букв не участвуют в поиске: префикс из одной буквы совпадает
+# почти со всеми вопросами, а индекс префиксов начинается с двух (prefix='2 3').
+SEARCH_MIN_TOKEN = 2
+
+SEARCH_TOKEN_RE = re.compile(r"\w+")
+
+
+def search_expression(text):
+    """Запрос FTS5 из введённого текста: все слова как префиксы ("сто*" AND "рос*")."""
+    tokens = SEARCH_TOKEN_RE.findall(text.replace("ё", "е").replace("Ё", "Е"))
+    return " ".join(f'"{token}"*' for token in tokens if len(token) >= SEARCH_MIN_TOKEN)
+
+
+_FLUSH = object()
+_STOP = object()
+
+
+def content_hash(question, answer):
+    """Хеш содержимого вопроса для отсева дубликатов при импорте."""
+    data = f"{question.strip()}\x1f{answer.strip()}".encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def print_error(message):
+    """Вывод ошибки базы данных в stderr (обработчик по умолчанию, без Qt)."""
+    print(message, file=sys.stderr)
+
+
+class ConnectionPool:
+    """Пул соединений SQLite, общий для всех окон и сессий одного процесса."""
+
+    def __init__(self, db_name, size=4, pragmas=DEFAULT_PRAGMAS):
+        self.db_name = db_name
+        self.size = size
+        self.pragmas = pragmas
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self.users = 0  # Сколько объектов баз данных пользуются пулом (см. get_pool/close_pool)
+
+    def open_connection(self):
+        """Открытие нового соединения, пригодного для работы из разных потоков."""
+        connection = sqlite3.connect(self.db_name, check_same_thread=False)
+        for pragma in self.pragmas:
+            connection.execute(f"PRAGMA {pragma}")
+        connection.create_function("content_hash", 2, content_hash, deterministic=True)
+        return connection
+
+    def acquire(self):
+        """Получение свободного соединения; при исчерпании пула — ожидание."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                connection = self.open_connection()
+                self._created += 1
+                return connection
+        return self._idle.get()
+
+    def release(self, connection):
+        """Возврат соединения в пул."""
+        self._idle.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер: соединение из пула с откатом при ошибке."""
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            self.release(connection)
+
+    def close(self):
+        """Закрытие всех простаивающих соединений пула."""
+        with self._lock:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                connection.close()
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name, size=4, pragmas=DEFAULT_PRAGMAS):
+    """Общий для процесса пул соединений к файлу базы данных.
+
+    Вопросы и результаты могут храниться в одном файле, тогда Database и
+    ResultsDatabase получают один и тот же пул; каждый вызов get_pool должен
+    быть парным с close_pool.
+    """
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = _pools[db_name] = ConnectionPool(db_name, size, pragmas)
+        pool.users += 1
+        return pool
+
+
+def close_pool(db_name):
+    """Закрытие общего пула соединений, когда его больше никто не использует."""
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            return
+        pool.users -= 1
+        if pool.users > 0:
+            return
+        del _pools[db_name]
+    pool.close()
+
+
+# Оценка по доле правильных ответов, как в calculate_grade; NULL, если число вопросов неизвестно
+GRADE_SQL = """
+    CASE WHEN {row}.total IS NULL OR {row}.total = 0 THEN NULL
+         WHEN {row}.score >= {row}.total * 0.75 THEN 5
+         WHEN {row}.score >= {row}.total * 0.5 THEN 4
+         WHEN {row}.score >= {row}.total * 0.25 THEN 3
+         ELSE 2 END
+"""
+
+# Агрегаты по результатам и ответам. Их поддерживают триггеры при каждой
+# записи, поэтому сводка читается без просмотра всех ответов. results_totals —
+# одна строка с итогами по всем ученикам, чтобы не суммировать student_stats.
+AGGREGATE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS student_stats (
+        name TEXT PRIMARY KEY,
+        attempts INTEGER NOT NULL,
+        total_score INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS results_totals (
+        attempts INTEGER NOT NULL,
+        total_score INTEGER NOT NULL,
+        students INTEGER NOT NULL
+    )
+    """,
+    """
+    INSERT INTO results_totals (attempts, total_score, students)
+    SELECT 0, 0, 0 WHERE NOT EXISTS (SELECT 1 FROM results_totals)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS question_stats (
+        question_id INTEGER PRIMARY KEY,
+        answers INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        total_response_time REAL NOT NULL,
+        timed_answers INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS grade_histogram (
+        grade INTEGER PRIMARY KEY,
+        count INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS question_stats_difficulty ON question_stats (CAST(correct AS REAL) / answers)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS results_stats_insert AFTER INSERT ON results BEGIN
+        INSERT INTO student_stats (name, attempts, total_score) VALUES (NEW.name, 1, NEW.score)
+            ON CONFLICT (name) DO UPDATE SET attempts = attempts + 1, total_score = total_score + NEW.score;
+        UPDATE results_totals SET attempts = attempts + 1, total_score = total_score + NEW.score,
+            students = students + ((SELECT attempts FROM student_stats WHERE name = NEW.name) = 1);
+        INSERT INTO grade_histogram (grade, count)
+            SELECT grade, 1 FROM (SELECT {GRADE_SQL.format(row="NEW")} AS grade) WHERE grade IS NOT NULL
+            ON CONFLICT (grade) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS results_stats_delete AFTER DELETE ON results BEGIN
+        UPDATE student_stats SET attempts = attempts - 1, total_score = total_score - OLD.score
+            WHERE name = OLD.name;
+        DELETE FROM student_stats WHERE name = OLD.name AND attempts <= 0;
+        UPDATE results_totals SET attempts = attempts - 1, total_score = total_score - OLD.score,
+            students = students - NOT EXISTS (SELECT 1 FROM student_stats WHERE name = OLD.name);
+        UPDATE grade_histogram SET count = count - 1 WHERE grade = {GRADE_SQL.format(row="OLD")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS results_stats_update AFTER UPDATE OF score, total ON results BEGIN
+        UPDATE student_stats SET total_score = total_score + NEW.score - OLD.score WHERE name = NEW.name;
+        UPDATE results_totals SET total_score = total_score + NEW.score - OLD.score;
+        UPDATE grade_histogram SET count = count - 1 WHERE grade = {GRADE_SQL.format(row="OLD")};
+        INSERT INTO grade_histogram (grade, count)
+            SELECT grade, 1 FROM (SELECT {GRADE_SQL.format(row="NEW")} AS grade) WHERE grade IS NOT NULL
+            ON CONFLICT (grade) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS answers_stats_insert AFTER INSERT ON answers BEGIN
+        INSERT INTO question_stats (question_id, answers, correct, total_response_time, timed_answers)
+            VALUES (NEW.question_id, 1, NEW.correct, IFNULL(NEW.response_time, 0), NEW.response_time IS NOT NULL)
+            ON CONFLICT (question_id) DO UPDATE SET
+                answers = answers + 1,
+                correct = correct + NEW.correct,
+                total_response_time = total_response_time + IFNULL(NEW.response_time, 0),
+                timed_answers = timed_answers + (NEW.response_time IS NOT NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS answers_stats_delete AFTER DELETE ON answers BEGIN
+        UPDATE question_stats SET
+            answers = answers - 1,
+            correct = correct - OLD.correct,
+            total_response_time = total_response_time - IFNULL(OLD.response_time, 0),
+            timed_answers = timed_answers - (OLD.response_time IS NOT NULL)
+        WHERE question_id = OLD.question_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS answers_stats_update AFTER UPDATE OF correct ON answers BEGIN
+        UPDATE question_stats SET correct = correct + NEW.correct - OLD.correct WHERE question_id = NEW.question_id;
+    END
+    """,
+]
+
+
+# Счётчик удалений и изменений вопросов. По нему кэш банка вопросов узнаёт о
+# правках из других процессов; новые вопросы видны по наибольшему id, поэтому
+# вставки (и массовый импорт) счётчик не трогают.
+CHANGES_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS questions_changes (counter INTEGER NOT NULL)",
+    "INSERT INTO questions_changes (counter) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM questions_changes)",
+    """
+    CREATE TRIGGER IF NOT EXISTS questions_changes_delete AFTER DELETE ON questions BEGIN
+        UPDATE questions_changes SET counter = counter + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS questions_changes_update
+    AFTER UPDATE OF question, correct_answer, tolerance ON questions BEGIN
+        UPDATE questions_changes SET counter = counter + 1;
+    END
+    """,
+]
+
+
+def questions_changes(connection):
+    """Текущее значение счётчика удалений и изменений вопросов."""
+    return connection.execute("SELECT counter FROM questions_changes").fetchone()[0]
+
+
+def questions_by_ids(connection, question_ids, chunk_size=500):
+    """Строки вопросов с заданными id (порядок не гарантируется), запросами по chunk_size id."""
+    rows = []
+    for start in range(0, len(question_ids), chunk_size):
+        chunk = question_ids[start:start + chunk_size]
+        rows.extend(connection.execute(
+            "SELECT id, question, correct_answer, tolerance FROM questions "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})", chunk))
+    return rows
+
+
+class QuestionCache:
+    """Общий для процесса кэш банка вопросов: плотный список id и LRU-кэш строк.
+
+    Список id хранит только числа, отсортированные по возрастанию, поэтому
+    выбор k случайных вопросов стоит O(k): k случайных позиций в списке и
+    чтение k строк по id. Кэш читает базу через собственное соединение и перед
+    каждым обращением сравнивает его PRAGMA data_version: если другие
+    соединения (в том числе из других процессов) что-то зафиксировали,
+    сверяются наибольший id и счётчик questions_changes. Новые вопросы
+    догружаются хвостом, а удаление или изменение, сделанное в обход кэша,
+    сбрасывает список и строки целиком. Свои удаления и изменения Database
+    сообщает кэшу сама, и они обходятся без перечитывания. generation растёт
+    при каждом изменении банка, по нему окна решают, нужно ли перечитывать
+    список при повторном показе.
+    """
+
+    def __init__(self, pool, row_cache_size=10000):
+        self.connection = pool.open_connection()
+        self.row_cache_size = row_cache_size
+        self._ids = None
+        self._tail_dirty = False
+        self._rows = OrderedDict()
+        self._data_version = None
+        self._last_id = None
+        self._changes = None
+        self._lock = threading.RLock()
+        self.generation = 0
+        self.users = 0  # Сколько объектов Database пользуются кэшем (см. get_question_cache)
+
+    def _validate(self):
+        """Сверка с базой, если с прошлой сверки другие соединения что-то зафиксировали"""
+        data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        changes = questions_changes(self.connection)
+        last_id = self.connection.execute("SELECT IFNULL(MAX(id), 0) FROM questions").fetchone()[0]
+        if changes != self._changes:
+            self._changes = changes
+            self._ids = None
+            self._rows.clear()
+            self.generation += 1
+        elif last_id != self._last_id:
+            self._tail_dirty = True
+            self.generation += 1
+        self._last_id = last_id
+
+    def _adopt(self, changes, count):
+        """Учёт своей записи: changes прочитан в её транзакции после count удалений или изменений.
+
+        Если до неё счётчик совпадал с известным кэшу, чужих правок не было.
+        """
+        if self._changes is not None and self._changes == changes - count:
+            self._changes = changes
+
+    def current_generation(self):
+        """generation с учётом изменений, зафиксированных другими соединениями"""
+        with self._lock:
+            self._validate()
+            return self.generation
+
+    def ids(self):
+        """Отсортированный список id всех вопросов"""
+        with self._lock:
+            self._validate()
+            if self._ids is None:
+                self._ids = array("q", chain.from_iterable(
+                    self.connection.execute("SELECT id FROM questions ORDER BY id")))
+                self._tail_dirty = False
+            elif self._tail_dirty:
+                self._ids.extend(chain.from_iterable(self.connection.execute(
+                    "SELECT id FROM questions WHERE id > ? ORDER BY id", (self._ids[-1] if self._ids else 0,))))
+                self._tail_dirty = False
+            return self._ids
+
+    def rows(self, question_ids):
+        """Строки вопросов в порядке question_ids (удалённые пропускаются)"""
+        with self._lock:
+            self._validate()
+            missing = [question_id for question_id in question_ids if question_id not in self._rows]
+            if missing:
+                for row in questions_by_ids(self.connection, missing):
+                    self._rows[row[0]] = row
+            result = []
+            for question_id in question_ids:
+                row = self._rows.get(question_id)
+                if row is not None:
+                    self._rows.move_to_end(question_id)
+                    result.append(row)
+            while len(self._rows) > self.row_cache_size:
+                self._rows.popitem(last=False)
+            return result
+
+    def sample(self, count, seed):
+        """Воспроизводимый по seed случайный вариант из count вопросов (0 — все)"""
+        with self._lock:
+            ids = self.ids()
+            count = len(ids) if count <= 0 else min(count, len(ids))
+            positions = random.Random(seed).sample(range(len(ids)), count)
+            return self.rows([ids[position] for position in positions])
+
+    def inserted(self):
+        with self._lock:
+            self._tail_dirty = True
+            self.generation += 1
+
+    def deleted(self, question_id, changes, count):
+        with self._lock:
+            self._adopt(changes, count)
+            self._rows.pop(question_id, None)
+            self.generation += 1
+            if self._ids is not None:
+                position = bisect_left(self._ids, question_id)
+                if position < len(self._ids) and self._ids[position] == question_id:
+                    del self._ids[position]
+
+    def changed(self, question_id, changes, count):
+        with self._lock:
+            self._adopt(changes, count)
+            self._rows.pop(question_id, None)
+            self.generation += 1
+
+    def cleared(self, changes, count):
+        with self._lock:
+            self._adopt(changes, count)
+            self._ids = array("q")
+            self._tail_dirty = False
+            self._last_id = 0
+            self._rows.clear()
+            self.generation += 1
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+_question_caches = {}
+
+
+def get_question_cache(db_name, pool):
+    """Общий для процесса кэш банка вопросов; каждый вызов парный с release_question_cache."""
+    with _pools_lock:
+        cache = _question_caches.get(db_name)
+        if cache is None:
+            cache = _question_caches[db_name] = QuestionCache(pool)
+        cache.users += 1
+        return cache
+
+
+def release_question_cache(db_name):
+    """Закрытие кэша банка вопросов, когда его больше никто не использует."""
+    with _pools_lock:
+        cache = _question_caches.get(db_name)
+        if cache is None:
+            return
+        cache.users -= 1
+        if cache.users > 0:
+            return
+        del _question_caches[db_name]
+    cache.close()
+
+
+# PRAGMA user_version хранит версии обеих схем по байту на каждую, чтобы вопросы
+# и результаты можно было держать в одном файле.
+QUESTIONS_SCHEMA = 0
+RESULTS_SCHEMA = 1
+
+
+def schema_version(connection, schema):
+    """Версия схемы schema, записанная в PRAGMA user_version."""
+    return connection.execute("PRAGMA user_version").fetchone()[0] >> (schema * 8) & 0xFF
+
+
+def migrate(connection, schema, migrations):
+    """Применение недостающих миграций схемы; возвращает число применённых.
+
+    migrations[i](connection) переводит схему с версии i на i + 1. Если схема
+    уже актуальна, выполняется только чтение PRAGMA user_version, без записи и
+    фиксации. Иначе миграции и новая версия фиксируются одной транзакцией
+    (BEGIN IMMEDIATE, чтобы два процесса не обновляли схему одновременно).
+    """
+    if schema_version(connection, schema) >= len(migrations):
+        return 0
+    connection.commit()
+    connection.execute("BEGIN IMMEDIATE")
+    version = schema_version(connection, schema)
+    for migration in migrations[version:]:
+        migration(connection)
+    packed = connection.execute("PRAGMA user_version").fetchone()[0]
+    packed = packed & ~(0xFF << (schema * 8)) | len(migrations) << (schema * 8)
+    connection.execute(f"PRAGMA user_version = {packed}")
+    connection.commit()
+    return max(0, len(migrations) - version)
+
+
+def ensure_columns(connection, table, columns):
+    """Добавление недостающих столбцов в таблицу, созданную старой версией программы."""
+    existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns:
+        if name not in existing:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+# Пауза перед повтором записи, если база занята дольше busy_timeout (например,
+# идёт импорт большого банка одной транзакцией): от первой до второй величины
+# с удвоением, в секундах.
+BUSY_RETRY_DELAYS = (0.05, 2.0)
+
+
+def is_busy_error(error):
+    """Ошибка из-за того, что базу держит другое соединение: запись стоит повторить"""
+    message = str(error)
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+class WriteBehindJournal:
+    """Отложенная запись с групповой фиксацией.
+
+    Вставки попадают в ограниченную очередь и записываются фоновым потоком:
+    всё, что накопилось за flush_interval, фиксируется одной транзакцией
+    через executemany. При переполнении очереди write() ждёт. Пока база
+    занята другим соединением, пачка повторяется и не теряется. Ошибки
+    записи копятся и возвращаются из flush()/close() в вызывающий поток.
+    """
+
+    def __init__(self, pool, flush_interval=0.05, max_batch=5000, queue_size=10000):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._errors = []
+        self._errors_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"journal:{pool.db_name}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, sql, params):
+        """Постановка вставки в очередь"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Журнал записи закрыт")
+        self._queue.put((sql, params))
+
+    def flush(self):
+        """Ожидание фиксации всего, что уже поставлено в очередь"""
+        if not self._closed and self._thread.is_alive():
+            done = threading.Event()
+            self._queue.put((_FLUSH, done))
+            done.wait()
+        return self._take_errors()
+
+    def close(self):
+        """Последняя фиксация, контрольная точка WAL и остановка потока"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put((_STOP, None))
+            self._thread.join()
+            atexit.unregister(self.close)
+        return self._take_errors()
+
+    def _take_errors(self):
+        with self._errors_lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def _collect(self):
+        """Сбор пачки вставок за один интервал; (пачка, ожидающие, стоп)"""
+        batch = []
+        waiters = []
+        sql, params = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if sql is _STOP:
+                return batch, waiters, True
+            if sql is _FLUSH:
+                waiters.append(params)
+                break
+            batch.append((sql, params))
+            timeout = deadline - time.monotonic()
+            if len(batch) >= self.max_batch or timeout <= 0:
+                break
+            try:
+                sql, params = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+        return batch, waiters, False
+
+    @staticmethod
+    def _write(connection, batch):
+        """Запись пачки одной транзакцией, с повтором, пока база занята"""
+        delay = BUSY_RETRY_DELAYS[0]
+        while True:
+            try:
+                with connection:
+                    for sql, rows in groupby(batch, key=lambda item: item[0]):
+                        connection.executemany(sql, [params for _, params in rows])
+                return
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e):
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, BUSY_RETRY_DELAYS[1])
+
+    def _commit(self, connection, batch):
+        """Запись пачки; если её отвергла сама база (например, UNIQUE) — построчно"""
+        try:
+            self._write(connection, batch)
+        except sqlite3.Error:
+            for row in batch:
+                try:
+                    self._write(connection, [row])
+                except sqlite3.Error as e:
+                    with self._errors_lock:
+                        self._errors.append(str(e))
+
+    def _run(self):
+        connection = self.pool.open_connection()
+        try:
+            while True:
+                batch, waiters, stop = self._collect()
+                if batch:
+                    self._commit(connection, batch)
+                if stop:
+                    try:
+                        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    except sqlite3.Error:
+                        pass
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+
+class Database:
+    """Класс для управления базой данных вопросов."""
+
+    def __init__(self, db_name="quiz.db", error_handler=None, pool_size=4, flush_interval=0.05):
+        self.db_name = db_name
+        self.error_handler = error_handler or print_error
+        self.pool = None
+        self.journal = None
+        self.cache = None
+        self.connect(db_name, pool_size, flush_interval)
+
+    def connect(self, db_name, pool_size=4, flush_interval=0.05):
+        """Соединение с базой данных для вопросов."""
+        try:
+            self.pool = get_pool(db_name, pool_size)
+            self.create_tables()
+            self.journal = WriteBehindJournal(self.pool, flush_interval)
+            self.cache = get_question_cache(db_name, self.pool)
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось подключиться к базе данных: {str(e)}")
+            sys.exit(1)
+
+    def create_tables(self):
+        """Создание или обновление схемы по версии в PRAGMA user_version."""
+        try:
+            with self.pool.connection() as connection:
+                migrate(connection, QUESTIONS_SCHEMA, [self.migrate_v1, self.migrate_v2])
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось создать таблицы: {str(e)}")
+            sys.exit(1)
+
+    def migrate_v1(self, connection):
+        """Схема вопросов с допуском, хешем содержимого и индексом поиска.
+
+        Файлы, созданные до нумерации версий, имеют версию 0 и могут уже
+        содержать часть таблиц, поэтому все шаги повторяемы.
+        """
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question TEXT NOT NULL,
+                correct_answer TEXT NOT NULL,
+                tolerance INTEGER NOT NULL DEFAULT 0,
+                content_hash TEXT
+            )
+        """)
+        ensure_columns(connection, "questions", [("tolerance", "INTEGER NOT NULL DEFAULT 0"),
+                                                 ("content_hash", "TEXT")])
+        connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS questions_content_hash ON questions (content_hash)")
+        # Старые строки без хеша; уже существующие дубликаты остаются с NULL
+        connection.execute("""
+            UPDATE OR IGNORE questions SET content_hash = content_hash(question, correct_answer)
+            WHERE content_hash IS NULL
+        """)
+
+        new_search_index = connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'questions_fts'").fetchone()[0] == 0
+        for statement in SEARCH_SCHEMA:
+            connection.execute(statement)
+        if new_search_index:
+            connection.execute(f"""
+                INSERT INTO questions_fts (rowid, question, correct_answer)
+                SELECT id, {SEARCH_FOLD_SQL.format("question")}, {SEARCH_FOLD_SQL.format("correct_answer")}
+                FROM questions
+            """)
+
+    def migrate_v2(self, connection):
+        """Счётчик удалений и изменений вопросов для сверки кэша между процессами."""
+        for statement in CHANGES_SCHEMA:
+            connection.execute(statement)
+
+    def insert_question(self, question, answer):
+        """Добавление вопроса в базу данных (через журнал отложенной записи).
+
+        В отличие от импорта, дубликат не пропускается молча: если такой вопрос с
+        этим ответом уже есть, вызывается обработчик ошибок и возвращается False.
+        Дубликат, ещё стоящий в очереди журнала, отклонит уникальный индекс, и
+        ошибка придёт при следующем flush().
+        """
+        digest = content_hash(question, answer)
+        try:
+            with self.pool.connection() as connection:
+                exists = connection.execute("SELECT 1 FROM questions WHERE content_hash = ?", (digest,)).fetchone()
+            if exists:
+                self.error_handler("Не удалось добавить вопрос: такой вопрос с этим ответом уже есть")
+                return False
+            self.journal.write("INSERT INTO questions (question, correct_answer, content_hash) VALUES (?, ?, ?)",
+                               (question, answer, digest))
+            self.cache.inserted()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось добавить вопрос: {str(e)}")
+            return False
+        return True
+
+    def flush(self):
+        """Ожидание записи отложенных вставок вопросов."""
+        for error in self.journal.flush():
+            self.error_handler(f"Не удалось добавить вопрос: {error}")
+
+    def get_questions(self):
+        """Получение всех вопросов из базы данных."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                return connection.execute("SELECT id, question, correct_answer, tolerance FROM questions").fetchall()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить вопросы: {str(e)}")
+            return []
+
+    def get_questions_by_ids(self, question_ids, chunk_size=500):
+        """Вопросы с заданными id (порядок не гарантируется)."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                return questions_by_ids(connection, question_ids, chunk_size)
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить вопросы: {str(e)}")
+            return []
+
+    def search_questions(self, text, limit=200):
+        """Поиск вопросов по словам (от двух букв) или их началам.
+
+        Если совпадений не больше SEARCH_RANK_LIMIT, все они ранжируются по bm25
+        и лучшие идут первыми. Иначе возвращаются limit самых новых совпадений
+        без ранжирования. Слово, которое есть в большинстве вопросов, дорого
+        при любом порядке: FTS5 сливает весь его список вхождений, и на 500 000
+        вопросов такой запрос занимает 40–160 мс (см. bench_search.py).
+        """
+        expression = search_expression(text)
+        if not expression:
+            return []
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                found = [row[0] for row in connection.execute("""
+                    SELECT rowid FROM questions_fts WHERE questions_fts MATCH ?
+                    ORDER BY rowid DESC LIMIT ?
+                """, (expression, SEARCH_RANK_LIMIT + 1))]
+                if len(found) > SEARCH_RANK_LIMIT:
+                    newest = found[:limit]
+                    rows = {row[0]: row for row in connection.execute(
+                        "SELECT id, question, correct_answer, tolerance FROM questions "
+                        f"WHERE id IN ({', '.join('?' * len(newest))})", newest)}
+                    return [rows[question_id] for question_id in newest if question_id in rows]
+                return connection.execute("""
+                    SELECT questions.id, questions.question, questions.correct_answer, questions.tolerance
+                    FROM (
+                        SELECT rowid, bm25(questions_fts, 1.0, 0.5) AS score FROM questions_fts
+                        WHERE questions_fts MATCH ? AND rowid >= ?
+                        ORDER BY score LIMIT ?
+                    ) AS found JOIN questions ON questions.id = found.rowid
+                    ORDER BY found.score
+                """, (expression, found[-1] if found else 0, limit)).fetchall()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось выполнить поиск: {str(e)}")
+            return []
+
+    def sample_questions(self, count=0, seed=None):
+        """Случайный вариант из count вопросов (0 — все в случайном порядке) за O(count).
+
+        При одинаковом seed и неизменном банке вопросов вариант повторяется.
+        """
+        self.flush()
+        try:
+            return self.cache.sample(count, seed)
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить вопросы: {str(e)}")
+            return []
+
+    def get_questions_page(self, after_id=0, limit=200):
+        """Страница вопросов с id больше after_id (keyset-пагинация по id)."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                return connection.execute(
+                    "SELECT id, question, correct_answer, tolerance FROM questions WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, limit)).fetchall()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить вопросы: {str(e)}")
+            return []
+
+    def import_questions(self, rows, batch_size=10000, progress=None):
+        """Массовый импорт вопросов одной транзакцией.
+
+        rows — итератор кортежей (question, correct_answer, tolerance); читается
+        пачками по batch_size, поэтому расход памяти не зависит от размера файла.
+        Дубликаты (по хешу содержимого) пропускаются. progress(прочитано, добавлено)
+        вызывается после каждой пачки. Возвращает (прочитано, добавлено) или None,
+        если импорт не удался и откачен.
+        """
+        self.flush()
+        rows = iter(rows)
+        read = inserted = 0
+        try:
+            with self.pool.connection() as connection:
+                last_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM questions").fetchone()[0]
+                connection.execute("UPDATE questions_fts_state SET deferred = 1")
+                while True:
+                    batch = [(question, answer, tolerance, content_hash(question, answer))
+                             for question, answer, tolerance in islice(rows, batch_size)]
+                    if not batch:
+                        break
+                    # rowcount, в отличие от total_changes, не учитывает строки индекса поиска из триггеров
+                    cursor = connection.executemany("""
+                        INSERT OR IGNORE INTO questions (question, correct_answer, tolerance, content_hash)
+                        VALUES (?, ?, ?, ?)
+                    """, batch)
+                    read += len(batch)
+                    inserted += cursor.rowcount
+                    if progress is not None:
+                        progress(read, inserted)
+                connection.execute(f"""
+                    INSERT INTO questions_fts (rowid, question, correct_answer)
+                    SELECT id, {SEARCH_FOLD_SQL.format("question")}, {SEARCH_FOLD_SQL.format("correct_answer")}
+                    FROM questions WHERE id > ?
+                """, (last_id,))
+                connection.execute("UPDATE questions_fts_state SET deferred = 0")
+                connection.commit()
+            self.cache.inserted()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось импортировать вопросы: {str(e)}")
+            return None
+        return read, inserted
+
+    def iter_questions(self, batch_size=1000):
+        """Потоковое чтение всех вопросов курсором, без загрузки таблицы в память."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.execute("SELECT id, question, correct_answer, tolerance FROM questions ORDER BY id")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось выгрузить вопросы: {str(e)}")
+
+    def get_question(self, question_id):
+        """Получение одного вопроса по ID (None, если его нет)."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                return connection.execute(
+                    "SELECT id, question, correct_answer, tolerance FROM questions WHERE id = ?",
+                    (question_id,)).fetchone()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить вопрос: {str(e)}")
+            return None
+
+    def update_answer_key(self, question_id, correct_answer, tolerance=0):
+        """Изменение правильного ответа (вариантов через |) и допуска опечаток.
+
+        Возвращает True, если ответ изменён; False, если вопроса нет или такой
+        же вопрос с этим ответом уже есть в банке.
+        """
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.execute("""
+                    UPDATE questions SET correct_answer = ?, tolerance = ?, content_hash = content_hash(question, ?)
+                    WHERE id = ?
+                """, (correct_answer, tolerance, correct_answer, question_id))
+                changes = questions_changes(connection)
+                connection.commit()
+            self.cache.changed(question_id, changes, cursor.rowcount)
+        except sqlite3.IntegrityError:
+            self.error_handler("Не удалось изменить ответ: такой вопрос с этим ответом уже есть")
+            return False
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось изменить ответ: {str(e)}")
+            return False
+        if cursor.rowcount == 0:
+            self.error_handler("Не удалось изменить ответ: вопрос не найден")
+            return False
+        return True
+
+    def delete_question(self, question_id):
+        """Удаление вопроса из базы данных по ID."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.execute("DELETE FROM questions WHERE id = ?", (question_id,))
+                changes = questions_changes(connection)
+                connection.commit()
+            self.cache.deleted(question_id, changes, cursor.rowcount)
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось удалить вопрос: {str(e)}")
+
+    def clear_questions(self):
+        """Очистка всех вопросов из базы данных и сброс автоинкремента."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.execute("DELETE FROM questions")
+                changes = questions_changes(connection)
+                connection.commit()
+            self.cache.cleared(changes, cursor.rowcount)
+            self.reset_id()  # Сброс автоинкремента после удаления всех вопросов
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось очистить вопросы: {str(e)}")
+
+    def reset_id(self):
+        """Сброс автоинкрементируемого id."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                connection.execute("DELETE FROM sqlite_sequence WHERE name='questions'")
+                connection.commit()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось сбросить id: {str(e)}")
+
+    def delete_all_questions(self):
+        """Удаление всех вопросов из базы данных и сброс счетчика ID."""
+        self.flush()
+        with self.pool.connection() as connection:
+            cursor = connection.execute("DELETE FROM questions")
+            changes = questions_changes(connection)
+            connection.execute("DELETE FROM sqlite_sequence WHERE name='questions'")  # Сбрасываем автоинкрементный счётчик
+            connection.commit()
+        self.cache.cleared(changes, cursor.rowcount)
+
+    def close(self):
+        """Запись отложенных вставок и закрытие соединений с базой данных."""
+        if self.journal is not None:
+            for error in self.journal.close():
+                self.error_handler(f"Не удалось добавить вопрос: {error}")
+            self.journal = None
+        if self.cache is not None:
+            release_question_cache(self.db_name)
+            self.cache = None
+        if self.pool is not None:
+            close_pool(self.db_name)
+            self.pool = None
+
+
+class ResultsDatabase:
+    """Класс для управления базой данных результатов."""
+
+    def __init__(self, db_name="results.db", error_handler=None, pool_size=4, flush_interval=0.05):
+        self.db_name = db_name
+        self.error_handler = error_handler or print_error
+        self.pool = None
+        self.journal = None
+        self.watch_connection = None  # Только для PRAGMA data_version, см. current_generation
+        self.generation = 0  # Растёт при каждом изменении результатов
+        self._data_version = None
+        self.connect(db_name, pool_size, flush_interval)
+
+    def connect(self, db_name, pool_size=4, flush_interval=0.05):
+        """Соединение с базой данных для результатов."""
+        try:
+            self.pool = get_pool(db_name, pool_size)
+            self.create_tables()
+            self.journal = WriteBehindJournal(self.pool, flush_interval)
+            self.watch_connection = self.pool.open_connection()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось подключиться к базе данных результатов: {str(e)}")
+            sys.exit(1)
+
+    def create_tables(self):
+        """Создание или обновление схемы результатов по версии в PRAGMA user_version."""
+        try:
+            with self.pool.connection() as connection:
+                migrate(connection, RESULTS_SCHEMA, [self.migrate_v1, self.migrate_v2])
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось создать таблицу результатов: {str(e)}")
+            sys.exit(1)
+
+    def migrate_v1(self, connection):
+        """Результаты, ответы по вопросам и агрегатные таблицы с триггерами.
+
+        Как и для вопросов, шаги повторяемы для файлов без номера версии.
+        """
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                session_id TEXT,
+                total INTEGER,
+                seed INTEGER,
+                variant TEXT
+            )
+        """)
+        ensure_columns(connection, "results", [("session_id", "TEXT"), ("total", "INTEGER"),
+                                               ("seed", "INTEGER"), ("variant", "TEXT")])
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                question_id INTEGER NOT NULL,
+                answer TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                correct INTEGER NOT NULL,
+                name TEXT NOT NULL DEFAULT '',
+                response_time REAL
+            )
+        """)
+        ensure_columns(connection, "answers", [("name", "TEXT NOT NULL DEFAULT ''"), ("response_time", "REAL")])
+        # Индекс по (question_id, normalized) служит и для выборок по одному question_id
+        connection.execute("CREATE INDEX IF NOT EXISTS answers_question ON answers (question_id, normalized)")
+        connection.execute("CREATE INDEX IF NOT EXISTS answers_name ON answers (name)")
+        connection.execute("CREATE INDEX IF NOT EXISTS results_session ON results (session_id)")
+        connection.execute("CREATE INDEX IF NOT EXISTS results_name ON results (name)")
+
+        new_aggregates = connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'student_stats'").fetchone()[0] == 0
+        for statement in AGGREGATE_SCHEMA:
+            connection.execute(statement)
+        if new_aggregates:
+            self.rebuild_aggregates(connection)
+
+    def migrate_v2(self, connection):
+        """Строка итогов results_totals; триггеры результатов пересоздаются, чтобы её обновлять."""
+        for trigger in ("results_stats_insert", "results_stats_delete", "results_stats_update"):
+            connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        for statement in AGGREGATE_SCHEMA:
+            connection.execute(statement)
+        self.rebuild_totals(connection)
+
+    def rebuild_totals(self, connection):
+        """Пересчёт строки итогов по статистике учеников."""
+        connection.execute("""
+            UPDATE results_totals SET (attempts, total_score, students) =
+                (SELECT IFNULL(SUM(attempts), 0), IFNULL(SUM(total_score), 0), COUNT(*) FROM student_stats)
+        """)
+
+    def rebuild_aggregates(self, connection):
+        """Пересчёт агрегатных таблиц по уже сохранённым результатам и ответам."""
+        for table in ("student_stats", "question_stats", "grade_histogram"):
+            connection.execute(f"DELETE FROM {table}")
+        connection.execute("""
+            INSERT INTO student_stats (name, attempts, total_score)
+            SELECT name, COUNT(*), SUM(score) FROM results GROUP BY name
+        """)
+        self.rebuild_totals(connection)
+        connection.execute("""
+            INSERT INTO question_stats (question_id, answers, correct, total_response_time, timed_answers)
+            SELECT question_id, COUNT(*), SUM(correct), IFNULL(SUM(response_time), 0), COUNT(response_time)
+            FROM answers GROUP BY question_id
+        """)
+        connection.execute(f"""
+            INSERT INTO grade_histogram (grade, count)
+            SELECT grade, COUNT(*) FROM (SELECT {GRADE_SQL.format(row="results")} AS grade FROM results)
+            WHERE grade IS NOT NULL GROUP BY grade
+        """)
+
+    def insert_result(self, name, score, session_id=None, total=None, seed=None, variant=None):
+        """Сохранение результата ученика в базе данных (через журнал отложенной записи).
+
+        variant — id вопросов варианта в порядке выдачи, seed — зерно, которым он выбран.
+        """
+        self.generation += 1
+        try:
+            self.journal.write("""
+                INSERT INTO results (name, score, session_id, total, seed, variant) VALUES (?, ?, ?, ?, ?, ?)
+            """, (name, score, session_id, total, seed,
+                  ",".join(str(question_id) for question_id in variant) if variant is not None else None))
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось сохранить результат: {str(e)}")
+
+    def insert_answers(self, session_id, name, answers):
+        """Сохранение ответов ученика: (question_id, answer, normalized, correct, response_time)."""
+        self.generation += 1
+        try:
+            for question_id, answer, normalized, correct, response_time in answers:
+                self.journal.write("""
+                    INSERT INTO answers (session_id, name, question_id, answer, normalized, correct, response_time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (session_id, name, question_id, answer, normalized, int(correct), response_time))
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось сохранить ответы: {str(e)}")
+
+    def current_generation(self):
+        """generation с учётом записей других соединений и процессов.
+
+        PRAGMA data_version отдельного соединения меняется после каждой чужой
+        фиксации в файле, например результатов от quiz_server.py. Своя
+        отложенная запись тоже фиксируется другим соединением и даёт лишнее
+        увеличение, из-за которого окно перечитает таблицы один раз.
+        """
+        try:
+            data_version = self.watch_connection.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось проверить изменения результатов: {str(e)}")
+            return self.generation
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self.generation += 1
+        return self.generation
+
+    def get_summary(self, hardest_limit=10):
+        """Сводка по результатам из агрегатных таблиц, без просмотра ответов."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                attempts, total_score, students = connection.execute(
+                    "SELECT attempts, total_score, students FROM results_totals").fetchone()
+                histogram = connection.execute(
+                    "SELECT grade, count FROM grade_histogram WHERE count > 0 ORDER BY grade DESC").fetchall()
+                hardest = connection.execute("""
+                    SELECT question_id, answers, 1 - CAST(correct AS REAL) / answers,
+                           CASE WHEN timed_answers > 0 THEN total_response_time / timed_answers END
+                    FROM question_stats WHERE answers > 0
+                    ORDER BY CAST(correct AS REAL) / answers
+                    LIMIT ?
+                """, (hardest_limit,)).fetchall()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить сводку: {str(e)}")
+            return None
+        return {
+            "attempts": attempts,
+            "students": students,
+            "average_score": total_score / attempts if attempts else 0,
+            "histogram": histogram,
+            "hardest": hardest,
+        }
+
+    def get_student_stats_page(self, after_id=0, limit=200):
+        """Страница статистики по ученикам: (rowid, имя, попыток, средний балл)."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                return connection.execute("""
+                    SELECT rowid, name, attempts, ROUND(CAST(total_score AS REAL) / attempts, 2)
+                    FROM student_stats WHERE rowid > ? ORDER BY rowid LIMIT ?
+                """, (after_id, limit)).fetchall()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить статистику учеников: {str(e)}")
+            return []
+
+    def regrade_question(self, question_id, answer_key):
+        """Пересчёт всех сохранённых ответов на вопрос по новому ключу.
+
+        Ключ проверяется по одному разу для каждой различной нормализованной
+        формы ответа, а ответы и баллы в results обновляются несколькими
+        запросами над множествами строк. Возвращает число изменённых ответов.
+        """
+        self.flush()
+        self.generation += 1
+        try:
+            with self.pool.connection() as connection:
+                distinct = connection.execute("SELECT DISTINCT normalized FROM answers WHERE question_id = ?",
+                                              (question_id,)).fetchall()
+                connection.execute("CREATE TEMP TABLE IF NOT EXISTS regrade_accepted (normalized TEXT PRIMARY KEY)")
+                connection.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS regrade_changes (
+                        id INTEGER PRIMARY KEY, session_id TEXT, delta INTEGER
+                    )
+                """)
+                connection.execute("CREATE INDEX IF NOT EXISTS temp.regrade_changes_session "
+                                   "ON regrade_changes (session_id)")
+                connection.execute("DELETE FROM regrade_accepted")
+                connection.execute("DELETE FROM regrade_changes")
+                connection.executemany("INSERT INTO regrade_accepted (normalized) VALUES (?)",
+                                       [row for row in distinct if answer_key.matches_normalized(row[0])])
+                connection.execute("""
+                    INSERT INTO regrade_changes (id, session_id, delta)
+                    SELECT id, session_id, new_correct - correct FROM (
+                        SELECT id, session_id, correct,
+                               normalized IN (SELECT normalized FROM regrade_accepted) AS new_correct
+                        FROM answers WHERE question_id = ?
+                    ) WHERE new_correct != correct
+                """, (question_id,))
+                connection.execute("""
+                    UPDATE answers SET correct = 1 - correct
+                    WHERE id IN (SELECT id FROM regrade_changes)
+                """)
+                connection.execute("""
+                    UPDATE results SET score = score + (
+                        SELECT SUM(delta) FROM regrade_changes WHERE regrade_changes.session_id = results.session_id
+                    )
+                    WHERE session_id IN (SELECT session_id FROM regrade_changes)
+                """)
+                changed = connection.execute("SELECT COUNT(*) FROM regrade_changes").fetchone()[0]
+                connection.commit()
+                return changed
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось пересчитать ответы: {str(e)}")
+            return 0
+
+    def flush(self):
+        """Ожидание записи отложенных результатов."""
+        for error in self.journal.flush():
+            self.error_handler(f"Не удалось сохранить результат: {error}")
+
+    def get_results(self):
+        """Получение всех результатов из базы данных."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                return connection.execute("SELECT name, score FROM results").fetchall()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить результаты: {str(e)}")
+            return []
+
+    def get_results_page(self, after_id=0, limit=200):
+        """Страница результатов с id больше after_id (keyset-пагинация по id)."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                return connection.execute(
+                    "SELECT id, name, score FROM results WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, limit)).fetchall()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить результаты: {str(e)}")
+            return []
+
+    def get_variant(self, result_id):
+        """Зерно и id вопросов варианта, выданного ученику: (seed, [id, ...]) или None."""
+        self.flush()
+        try:
+            with self.pool.connection() as connection:
+                row = connection.execute("SELECT seed, variant FROM results WHERE id = ?", (result_id,)).fetchone()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось получить вариант: {str(e)}")
+            return None
+        if row is None or row[1] is None:
+            return None
+        return row[0], [int(question_id) for question_id in row[1].split(",") if question_id]
+
+    def clear_results(self):
+        """Очистка базы данных результатов."""
+        self.flush()
+        self.generation += 1
+        try:
+            with self.pool.connection() as connection:
+                # Триггеры удаления всё равно срабатывают для каждой строки, но после очистки
+                # агрегатов их UPDATE не находят строк, и таблицы агрегатов остаются пустыми.
+                # Строку итогов триггеры уменьшают, поэтому она обнуляется после удаления.
+                for table in ("student_stats", "question_stats", "grade_histogram"):
+                    connection.execute(f"DELETE FROM {table}")
+                connection.execute("DELETE FROM results")
+                connection.execute("DELETE FROM answers")
+                connection.execute("UPDATE results_totals SET attempts = 0, total_score = 0, students = 0")
+                connection.commit()
+        except sqlite3.Error as e:
+            self.error_handler(f"Не удалось очистить результаты: {str(e)}")
+
+    def close(self):
+        """Запись отложенных результатов и закрытие соединений с базой данных результатов."""
+        if self.journal is not None:
+            for error in self.journal.close():
+                self.error_handler(f"Не удалось сохранить результат: {error}")
+            self.journal = None
+        if self.watch_connection is not None:
+            self.watch_connection.close()
+            self.watch_connection = None
+        if self.pool is not None:
+            close_pool(self.db_name)
+            self.pool = None
@@ -0,0 +1,192 @@
+import json
+import time
+import inspect
+import threading
+from bisect import bisect_left
+from functools import wraps
+from contextlib import contextmanager
+
+# Верхние границы корзин гистограммы задержек, мс; последняя корзина — всё, что больше
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Гистограмма задержек с постоянными корзинами и точными min/max/суммой.
+
+    Память не зависит от числа наблюдений, а процентили оцениваются сверху
+    границей корзины (не больше наблюдавшегося максимума).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, milliseconds):
+        self.count += 1
+        self.total += milliseconds
+        self.min = milliseconds if self.min is None else min(self.min, milliseconds)
+        self.max = max(self.max, milliseconds)
+        self.buckets[bisect_left(BUCKETS_MS, milliseconds)] += 1
+
+    def percentile(self, fraction):
+        """Оценка процентиля fraction (0.5, 0.95, ...) в миллисекундах"""
+        if not self.count:
+            return None
+        seen = 0
+        for position, count in enumerate(self.buckets):
+            seen += count
+            if seen >= fraction * self.count:
+                return min(BUCKETS_MS[position], self.max) if position < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "min_ms": round(self.min, 3) if self.min is not None else None,
+            "max_ms": round(self.max, 3),
+            "p50_ms": round(self.percentile(0.5), 3) if self.count else None,
+            "p95_ms": round(self.percentile(0.95), 3) if self.count else None,
+            "p99_ms": round(self.percentile(0.99), 3) if self.count else None,
+            "buckets": {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+
+class Metrics:
+    """Счётчики и гистограммы задержек, общие для всех потоков процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        """Запись одного измерения длительности в гистограмму name"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds * 1000)
+
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self):
+        """Все счётчики и гистограммы в виде словаря, пригодного для JSON"""
+        with self._lock:
+            return {
+                "counters": dict(sorted(self.counters.items())),
+                "latency": {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write(self.to_json())
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+metrics = Metrics()
+
+_originals = {}  # (класс, имя метода) -> исходная функция
+
+
+def positional_limit(function):
+    """Сколько позиционных аргументов принимает функция (None — сколько угодно)"""
+    parameters = inspect.signature(function).parameters.values()
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+        return None
+    return sum(parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+               for parameter in parameters)
+
+
+def timed(function, name, registry=metrics, slot=False):
+    """Обёртка, которая записывает длительность каждого вызова в гистограмму name.
+
+    Исключения считаются в счётчике name.errors. У генераторов измеряется весь
+    обход. Qt передаёт слотам аргументы сигнала (например, checked у clicked);
+    для slot=True обёртка, как и сам PyQt для обычных методов, отбрасывает
+    лишние. Остальным функциям аргументы передаются без изменений.
+    """
+    limit = positional_limit(function) if slot else None
+
+    if inspect.isgeneratorfunction(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                yield from function(*args[:limit], **kwargs)
+            except BaseException:
+                registry.increment(f"{name}.errors")
+                raise
+            finally:
+                registry.observe(name, time.perf_counter() - started)
+        return wrapper
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args[:limit], **kwargs)
+        except BaseException:
+            registry.increment(f"{name}.errors")
+            raise
+        finally:
+            registry.observe(name, time.perf_counter() - started)
+    return wrapper
+
+
+def public_methods(cls):
+    """Имена открытых методов, объявленных в самом классе"""
+    return [name for name, value in vars(cls).items() if inspect.isfunction(value) and not name.startswith("_")]
+
+
+def instrument(cls, names=None, registry=metrics, slots=False):
+    """Замер вызовов методов класса (по умолчанию — всех открытых) под именами «Класс.метод».
+
+    Методы подменяются в самом классе, поэтому замеряются и уже созданные
+    объекты. Повторный вызов для того же метода ничего не меняет. slots=True —
+    методы подключены к сигналам Qt (см. timed).
+    """
+    for name in names if names is not None else public_methods(cls):
+        if (cls, name) in _originals:
+            continue
+        function = vars(cls)[name]
+        _originals[(cls, name)] = function
+        setattr(cls, name, timed(function, f"{cls.__name__}.{name}", registry, slots))
+
+
+def uninstrument():
+    """Возврат исходных методов всем замеренным классам"""
+    for (cls, name), function in _originals.items():
+        setattr(cls, name, function)
+    _originals.clear()
+
+
+def install(registry=metrics):
+    """Замер всех методов Database и ResultsDatabase и групповых фиксаций журнала записи"""
+    from database import Database, ResultsDatabase, WriteBehindJournal
+
+    instrument(Database, registry=registry)
+    instrument(ResultsDatabase, registry=registry)
+    instrument(WriteBehindJournal, ["_commit"], registry)
@@ -0,0 +1,124 @@
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+
+class HttpClient:
+    """Минимальный HTTP/1.1-клиент с keep-alive для нагрузочного теста."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        """Отправка запроса; возвращает (статус, JSON-ответ)"""
+        body = json.dumps(payload or {}, ensure_ascii=False).encode("utf-8")
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length)
+        return status, json.loads(data.decode("utf-8"))
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку (метод ближайшего ранга)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+async def simulate_student(number, args, latencies, errors):
+    """Один ученик: начало теста, ответы до конца, завершение"""
+    rng = random.Random(args.seed + number)
+    client = HttpClient(args.host, args.port)
+    await client.connect()
+    try:
+        status, state = await client.request("POST", "/sessions", {"name": f"Ученик {number}"})
+        if status != 200:
+            errors.append(state.get("error", status))
+            return
+        session_id = state["session_id"]
+        finished = state["finished"]
+        while not finished:
+            if args.think_time:
+                await asyncio.sleep(rng.uniform(0, args.think_time))
+            started = time.perf_counter()
+            status, reply = await client.request("POST", f"/sessions/{session_id}/answer",
+                                                 {"answer": rng.choice(args.answers)})
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(reply.get("error", status))
+                return
+            finished = reply["finished"]
+    finally:
+        await client.close()
+
+
+async def run(args):
+    latencies = []
+    errors = []
+    started = time.perf_counter()
+    await asyncio.gather(*(simulate_student(number, args, latencies, errors)
+                           for number in range(1, args.students + 1)))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def report(latencies, errors, elapsed, students):
+    """Вывод сводки по задержкам и пропускной способности"""
+    latencies = sorted(latencies)
+    print(f"Учеников: {students}, ответов: {len(latencies)}, ошибок: {len(errors)}")
+    print(f"Время: {elapsed:.2f} с, ответов в секунду: {len(latencies) / elapsed if elapsed else 0:.1f}")
+    print(f"Задержка ответа p50: {percentile(latencies, 0.50) * 1000:.2f} мс, "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} мс")
+    if errors:
+        print(f"Первая ошибка: {errors[0]}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервера проверки знаний")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--students", type=int, default=100, help="число одновременных учеников")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="максимальная пауза перед ответом, секунды")
+    parser.add_argument("--answers", nargs="+", default=["да", "нет", "42"],
+                        help="варианты ответов, из которых выбирает ученик")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    latencies, errors, elapsed = asyncio.run(run(args))
+    report(latencies, errors, elapsed, args.students)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+from bisect import bisect_left
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class KeysetTableModel(QAbstractTableModel):
+    """Табличная модель, которая подгружает строки страницами по возрастанию id.
+
+    fetch_page(after_id, limit) должен вернуть не более limit строк с id больше
+    after_id, упорядоченных по id; первый элемент каждой строки — id. Загружаются
+    только страницы, до которых пролистал пользователь, а добавление и удаление
+    строк меняют модель точечно, без полной перезагрузки.
+
+    set_rows показывает готовый набор строк в произвольном порядке (например,
+    результаты поиска) без подгрузки; reload возвращает постраничный режим.
+    """
+
+    IdRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, fetch_page, columns, page_size=200, parent=None):
+        super().__init__(parent)
+        self.fetch_page = fetch_page
+        self.columns = columns  # [(заголовок, индекс поля в строке), ...]
+        self.page_size = page_size
+        self.rows = []
+        self.ids = []
+        self.exhausted = False
+        self.keyset = True  # Строки упорядочены по id и подгружаются страницами
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(row[self.columns[index.column()][1]])
+        if role == self.IdRole:
+            return row[0]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][0]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Загрузка следующей страницы после последнего загруженного id"""
+        if parent.isValid() or self.exhausted:
+            return
+        rows = self.fetch_page(self.ids[-1] if self.ids else 0, self.page_size)
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.ids.extend(row[0] for row in rows)
+            self.endInsertRows()
+
+    def reload(self):
+        """Сброс модели и загрузка первой страницы"""
+        self.beginResetModel()
+        self.rows = []
+        self.ids = []
+        self.exhausted = False
+        self.keyset = True
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_rows(self, rows):
+        """Показ готового набора строк вместо постраничной загрузки"""
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.ids = [row[0] for row in self.rows]
+        self.exhausted = True
+        self.keyset = False
+        self.endResetModel()
+
+    def fetch_new(self):
+        """Подгрузка строк, добавленных после того, как модель дошла до конца"""
+        if self.keyset and self.exhausted:
+            self.exhausted = False
+            self.fetchMore()
+
+    def remove_id(self, row_id):
+        """Удаление строки с заданным id, если она уже загружена"""
+        if self.keyset:
+            position = bisect_left(self.ids, row_id)
+        else:
+            position = self.ids.index(row_id) if row_id in self.ids else len(self.ids)
+        if position < len(self.ids) and self.ids[position] == row_id:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self.rows[position]
+            del self.ids[position]
+            self.endRemoveRows()
+
+    def clear(self):
+        """Очистка модели после удаления всех строк из базы"""
+        self.beginResetModel()
+        self.rows = []
+        self.ids = []
+        self.exhausted = True
+        self.keyset = True
+        self.endResetModel()
+
+    def id_at(self, index):
+        """id строки для индекса представления"""
+        return self.rows[index.row()][0]
@@ -0,0 +1,183 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+from database import Database
+
+FIELDS = ("question", "correct_answer", "tolerance")
+
+
+def detect_format(path, requested=None):
+    """Формат файла по ключу --format или по расширению"""
+    if requested:
+        return requested
+    return "jsonl" if os.path.splitext(path)[1].lower() in (".jsonl", ".json", ".ndjson") else "csv"
+
+
+class BankFormatError(ValueError):
+    """Ошибка в файле банка вопросов: неверный заголовок или строка"""
+
+
+def parse_tolerance(value, line):
+    if value in (None, ""):
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise BankFormatError(f"строка {line}: допуск должен быть целым числом, а не {value!r}")
+
+
+def read_csv(stream):
+    """Вопросы из CSV с заголовком question,correct_answer[,tolerance]"""
+    reader = csv.reader(stream)
+    header = [name.strip() for name in next(reader, [])]
+    missing = [name for name in FIELDS[:2] if name not in header]
+    if missing:
+        raise BankFormatError(f"в заголовке CSV нет столбцов {', '.join(missing)} (ожидается {','.join(FIELDS)})")
+    question_index, answer_index = header.index("question"), header.index("correct_answer")
+    tolerance_index = header.index("tolerance") if "tolerance" in header else None
+    for row in reader:
+        if len(row) <= max(question_index, answer_index):
+            continue
+        question, answer = row[question_index], row[answer_index]
+        if question and answer:
+            tolerance = row[tolerance_index] if tolerance_index is not None and tolerance_index < len(row) else None
+            yield question, answer, parse_tolerance(tolerance, reader.line_num)
+
+
+def read_jsonl(stream):
+    """Вопросы из JSON Lines: по одному объекту на строку"""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise BankFormatError(f"строка {line_number}: некорректный JSON ({e})")
+        if not isinstance(row, dict):
+            raise BankFormatError(f"строка {line_number}: ожидается объект JSON")
+        question, answer = row.get("question"), row.get("correct_answer")
+        for name, value in (("question", question), ("correct_answer", answer)):
+            if value is not None and not isinstance(value, str):
+                raise BankFormatError(f"строка {line_number}: поле {name} должно быть строкой, а не {value!r}")
+        if question and answer:
+            yield question, answer, parse_tolerance(row.get("tolerance"), line_number)
+
+
+def write_csv(stream, rows):
+    writer = csv.writer(stream)
+    writer.writerow(FIELDS)
+    for count, (_, question, answer, tolerance) in enumerate(rows, 1):
+        writer.writerow((question, answer, tolerance))
+        yield count
+
+
+def write_jsonl(stream, rows):
+    for count, (_, question, answer, tolerance) in enumerate(rows, 1):
+        stream.write(json.dumps({"question": question, "correct_answer": answer, "tolerance": tolerance},
+                                ensure_ascii=False))
+        stream.write("\n")
+        yield count
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl}
+
+
+class Progress:
+    """Вывод хода работы в stderr не чаще раза в interval секунд"""
+
+    def __init__(self, title, interval=0.5, enabled=True):
+        self.title = title
+        self.interval = interval
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.shown = 0.0
+
+    def __call__(self, count, extra=None, final=False):
+        now = time.perf_counter()
+        if not self.enabled or (not final and now - self.shown < self.interval):
+            return
+        self.shown = now
+        elapsed = now - self.started
+        rate = count / elapsed if elapsed else 0
+        details = f", {extra}" if extra else ""
+        print(f"\r{self.title}: {count}{details} ({rate:,.0f} в секунду)", end="\n" if final else "",
+              file=sys.stderr, flush=True)
+
+
+def import_file(database, path, file_format=None, batch_size=10000, show_progress=True):
+    """Импорт банка вопросов из файла; возвращает (прочитано, добавлено).
+
+    Ошибка в файле (BankFormatError) откатывает весь импорт. Если импорт не
+    удался из-за базы данных, возвращает None (сообщение уже выведено).
+    """
+    reader = READERS[detect_format(path, file_format)]
+    progress = Progress("Импорт", enabled=show_progress)
+    # utf-8-sig пропускает метку BOM, которую добавляет Excel при сохранении CSV
+    with open(path, newline="", encoding="utf-8-sig") as stream:
+        result = database.import_questions(
+            reader(stream), batch_size, lambda read, inserted: progress(read, f"новых {inserted}"))
+    if result is not None:
+        read, inserted = result
+        progress(read, f"новых {inserted}", final=True)
+    return result
+
+
+def export_file(database, path, file_format=None, show_progress=True):
+    """Выгрузка банка вопросов в файл; возвращает число строк"""
+    writer = WRITERS[detect_format(path, file_format)]
+    progress = Progress("Экспорт", enabled=show_progress)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as stream:
+        for count in writer(stream, database.iter_questions()):
+            if count % 1000 == 0:
+                progress(count)
+    progress(count, final=True)
+    return count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт и экспорт банка вопросов (CSV или JSON Lines)")
+    parser.add_argument("--db", default="quiz.db", help="файл базы вопросов")
+    parser.add_argument("--format", choices=sorted(READERS), help="по умолчанию — по расширению файла")
+    parser.add_argument("--quiet", action="store_true", help="не показывать ход работы")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="добавить вопросы из файла")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=10000)
+    export_parser = commands.add_parser("export", help="выгрузить все вопросы в файл")
+    export_parser.add_argument("path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database = Database(args.db)
+    try:
+        if args.command == "import":
+            result = import_file(database, args.path, args.format, args.batch_size, not args.quiet)
+            if result is None:
+                print(f"\nИмпорт из {args.path} не выполнен, вопросы не добавлены", file=sys.stderr)
+                return 1
+            read, inserted = result
+            print(f"Прочитано: {read}, добавлено: {inserted}, дубликатов: {read - inserted}")
+        else:
+            count = export_file(database, args.path, args.format, not args.quiet)
+            print(f"Выгружено вопросов: {count}")
+    except BankFormatError as e:
+        print(f"\nОшибка в файле {args.path}: {e}. Вопросы не импортированы", file=sys.stderr)
+        return 1
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"\nОшибка при работе с файлом {args.path}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        database.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import math
+import time
+import uuid
+import random
+import threading
+from collections import namedtuple
+
+from answer_index import AnswerIndex
+
+# Результат проверки одного ответа
+AnswerResult = namedtuple("AnswerResult", "correct correct_answer score finished")
+
+
+class SessionFinished(Exception):
+    """Попытка ответить в уже завершённом (или просроченном) тесте."""
+
+
+def format_time(seconds):
+    """Форматирование времени"""
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes:02}:{seconds:02}"
+
+
+def calculate_grade(score, total_questions):
+    """Подсчёт оценки на основе баллов"""
+    if total_questions == 0:
+        return "Нет вопросов"
+
+    if score >= total_questions * 0.75:
+        return "Отлично\n оценка 5"
+    elif score >= total_questions * 0.5:
+        return "Хорошо\n оценка 4"
+    elif score >= total_questions * 0.25:
+        return "Удовлетворительно\n оценка 3"
+    else:
+        return "Неудовлетворительно\n оценка 2"
+
+
+class QuizSession:
+    """Одно прохождение теста учеником. Не зависит от Qt и от сети.
+
+    Время теста задаётся крайним сроком (deadline) по монотонным часам,
+    а не посекундным счётчиком, поэтому сессии не нужен собственный таймер.
+    """
+
+    def __init__(self, student_name, questions, duration, clock=time.monotonic, session_id=None, seed=None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.seed = seed
+        self.student_name = student_name
+        self.questions = list(questions)
+        self.answer_index = AnswerIndex(self.questions)
+        self.answers = []  # (question_id, answer, normalized, correct, response_time)
+        self.duration = duration
+        self.clock = clock
+        self.deadline = clock() + duration
+        self.question_started = clock()
+        self.score = 0
+        self.current_question_index = 0
+        self.finished = False
+
+    def remaining_time(self):
+        """Оставшееся время в целых секундах"""
+        return max(0, math.ceil(self.deadline - self.clock()))
+
+    def is_expired(self):
+        """Истекло ли время теста"""
+        return self.clock() >= self.deadline
+
+    def has_questions_left(self):
+        return self.current_question_index < len(self.questions)
+
+    def current_question(self):
+        """Текст текущего вопроса с номером или None, если вопросы закончились"""
+        if self.finished or not self.has_questions_left():
+            return None
+        question_number = self.current_question_index + 1
+        return f"Вопрос {question_number}: {self.questions[self.current_question_index][1]}"
+
+    def check_answer(self, answer):
+        """Проверка ответа и переход к следующему вопросу"""
+        if self.finished or self.is_expired() or not self.has_questions_left():
+            self.finished = True
+            raise SessionFinished("Тест завершён")
+        if answer == '':
+            raise ValueError("Вы не ввели ответ")
+
+        question_id = self.questions[self.current_question_index][0]
+        correct, normalized = self.answer_index.check(question_id, answer)
+        now = self.clock()
+        self.answers.append((question_id, answer, normalized, correct, now - self.question_started))
+        self.question_started = now
+        if correct:
+            self.score += 1
+        self.current_question_index += 1
+        if not self.has_questions_left():
+            self.finished = True
+        return AnswerResult(correct, self.answer_index[question_id].display, self.score, self.finished)
+
+    def finish(self):
+        """Завершение теста; возвращает оценку"""
+        self.finished = True
+        return self.grade()
+
+    def grade(self):
+        return calculate_grade(self.score, len(self.questions))
+
+    def variant(self):
+        """id вопросов в порядке выдачи"""
+        return [row[0] for row in self.questions]
+
+    def state(self):
+        """Состояние сессии в виде словаря (для сетевого API)"""
+        return {
+            "session_id": self.session_id,
+            "name": self.student_name,
+            "question": self.current_question(),
+            "number": self.current_question_index + 1,
+            "total": len(self.questions),
+            "score": self.score,
+            "remaining": self.remaining_time(),
+            "finished": self.finished,
+        }
+
+
+def save_session(results_database, session):
+    """Сохранение результата сессии и всех её ответов"""
+    results_database.insert_result(session.student_name, session.score, session.session_id,
+                                   len(session.questions), session.seed, session.variant())
+    results_database.insert_answers(session.session_id, session.student_name, session.answers)
+
+
+class QuizEngine:
+    """Набор активных сессий поверх общих баз вопросов и результатов.
+
+    Методы start_session и finish_session обращаются к базе данных и могут
+    блокировать поток; check_answer работает только с памятью.
+    """
+
+    def __init__(self, database, results_database, duration=60, clock=time.monotonic, question_count=0):
+        self.database = database
+        self.results_database = results_database
+        self.duration = duration
+        self.question_count = question_count
+        self.clock = clock
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def start_session(self, student_name, seed=None):
+        """Создание сессии для ученика со случайным (или заданным seed) вариантом"""
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+        questions = self.database.sample_questions(self.question_count, seed)
+        session = QuizSession(student_name, questions, self.duration, self.clock, seed=seed)
+        with self._lock:
+            self.sessions[session.session_id] = session
+        return session
+
+    def get_session(self, session_id):
+        """Поиск активной сессии; KeyError, если её нет"""
+        with self._lock:
+            return self.sessions[session_id]
+
+    def check_answer(self, session_id, answer):
+        return self.get_session(session_id).check_answer(answer)
+
+    def finish_session(self, session_id):
+        """Завершение сессии и сохранение результата (ровно один раз)"""
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            raise KeyError(session_id)
+        grade = session.finish()
+        save_session(self.results_database, session)
+        return session, grade
+
+    def cancel_session(self, session_id):
+        """Удаление сессии без сохранения результата"""
+        with self._lock:
+            self.sessions.pop(session_id, None)
@@ -0,0 +1,392 @@
+import sys
+import json
+import base64
+import struct
+import asyncio
+import hashlib
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from database import Database, ResultsDatabase
+from quiz_engine import QuizEngine, SessionFinished
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_BODY_SIZE = 64 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    """Ошибка запроса, возвращаемая клиенту с кодом статуса."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def string_field(data, name):
+    """Строковое поле JSON-запроса; пустая строка, если поля нет."""
+    value = data.get(name, "")
+    if not isinstance(value, str):
+        raise HttpError(400, f"Поле {name} должно быть строкой")
+    return value
+
+
+async def read_request(reader):
+    """Чтение одного HTTP-запроса; None, если клиент закрыл соединение."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Некорректная строка запроса")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HttpError(400, "Некорректный заголовок Content-Length")
+    if length > MAX_BODY_SIZE:
+        raise HttpError(413, "Слишком большой запрос")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+def encode_response(status, payload, keep_alive=True):
+    """Формирование HTTP-ответа с JSON-телом."""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def apply_mask(data, mask):
+    """Наложение (и снятие) маски WebSocket-кадра."""
+    if not data:
+        return data
+    repeated = (mask * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(data), "big")
+
+
+def encode_frame(payload, opcode=0x1, mask=None):
+    """Кодирование одного WebSocket-кадра (клиент обязан передать mask)."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, mask_bit | length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, mask_bit | 127, length)
+    if mask:
+        return header + mask + apply_mask(payload, mask)
+    return header + payload
+
+
+async def read_frame(reader):
+    """Чтение одного WebSocket-кадра: (opcode, данные)."""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_BODY_SIZE:
+        raise HttpError(413, "Слишком большой кадр")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = apply_mask(payload, mask)
+    return opcode, payload
+
+
+class QuizServer:
+    """Асинхронный HTTP/WebSocket-сервер для одновременной сдачи тестов.
+
+    Все сессии живут в одном QuizEngine. Время теста контролирует сервер:
+    на каждую сессию ставится один отложенный вызов на момент её дедлайна,
+    вместо посекундного таймера у каждого клиента. Обращения к базе данных
+    выполняются в пуле потоков, чтобы не блокировать цикл событий.
+    """
+
+    def __init__(self, engine, host="127.0.0.1", port=8080, workers=8):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.deadline_handles = {}
+        self.listeners = {}
+        self.server = None
+
+    async def start(self):
+        """Запуск прослушивания порта"""
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def close(self):
+        """Остановка сервера и завершение фоновых потоков"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for handle in self.deadline_handles.values():
+            handle.cancel()
+        self.deadline_handles.clear()
+        self.executor.shutdown(wait=True)
+
+    async def run_blocking(self, function, *args):
+        """Выполнение блокирующего вызова (база данных) в пуле потоков"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    def get_session(self, session_id):
+        try:
+            return self.engine.get_session(session_id)
+        except KeyError:
+            raise HttpError(404, "Сессия не найдена")
+
+    async def start_session(self, name):
+        """Начало теста для ученика"""
+        if not name:
+            raise HttpError(400, "Вы не ввели имя.")
+        session = await self.run_blocking(self.engine.start_session, name)
+        if not session.questions:
+            self.engine.cancel_session(session.session_id)
+            raise HttpError(409, "Нет доступных вопросов для теста!")
+        loop = asyncio.get_running_loop()
+        self.deadline_handles[session.session_id] = loop.call_later(
+            session.duration, self.on_deadline, session.session_id)
+        return session.state()
+
+    async def answer(self, session_id, answer):
+        """Проверка ответа ученика"""
+        session = self.get_session(session_id)
+        try:
+            result = session.check_answer(answer)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        except SessionFinished:
+            return await self.finish(session_id)
+
+        response = {"correct": result.correct, "correct_answer": result.correct_answer}
+        if result.finished:
+            response.update(await self.finish(session_id))
+        else:
+            response.update(session.state())
+        return response
+
+    async def finish(self, session_id):
+        """Завершение теста и сохранение результата"""
+        handle = self.deadline_handles.pop(session_id, None)
+        if handle is not None:
+            handle.cancel()
+        try:
+            session, grade = await self.run_blocking(self.engine.finish_session, session_id)
+        except KeyError:
+            raise HttpError(404, "Сессия не найдена")
+        return {
+            "session_id": session.session_id,
+            "finished": True,
+            "score": session.score,
+            "total": len(session.questions),
+            "grade": grade,
+        }
+
+    def on_deadline(self, session_id):
+        """Срабатывание дедлайна сессии"""
+        self.deadline_handles.pop(session_id, None)
+        asyncio.ensure_future(self.expire(session_id))
+
+    async def expire(self, session_id):
+        """Принудительное завершение просроченной сессии с уведомлением по WebSocket"""
+        try:
+            summary = await self.finish(session_id)
+        except HttpError:
+            return
+        notify = self.listeners.pop(session_id, None)
+        if notify is not None:
+            summary["event"] = "expired"
+            try:
+                await notify(summary)
+            except ConnectionError:
+                pass
+
+    async def dispatch(self, method, path, body):
+        """Маршрутизация HTTP-запроса"""
+        try:
+            data = json.loads(body.decode("utf-8")) if body else {}
+        except (UnicodeDecodeError, ValueError):
+            raise HttpError(400, "Некорректный JSON")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Некорректный JSON")
+
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+        if parts == ["sessions"]:
+            if method != "POST":
+                raise HttpError(405, "Метод не поддерживается")
+            return await self.start_session(string_field(data, "name").strip())
+        if len(parts) == 2 and parts[0] == "sessions":
+            if method != "GET":
+                raise HttpError(405, "Метод не поддерживается")
+            return self.get_session(parts[1]).state()
+        if len(parts) == 3 and parts[0] == "sessions":
+            if method != "POST":
+                raise HttpError(405, "Метод не поддерживается")
+            if parts[2] == "answer":
+                return await self.answer(parts[1], string_field(data, "answer"))
+            if parts[2] == "finish":
+                return await self.finish(parts[1])
+        raise HttpError(404, "Не найдено")
+
+    async def handle_client(self, reader, writer):
+        """Обработка одного соединения (HTTP keep-alive или WebSocket)"""
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    if headers.get("upgrade", "").lower() == "websocket":
+                        await self.handle_websocket(reader, writer, headers)
+                        break
+                    status, payload = 200, await self.dispatch(method, path, body)
+                except HttpError as e:
+                    status, payload, headers = e.status, {"error": e.message}, {"connection": "close"}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    raise
+                except Exception:
+                    # Ошибка в обработчике не должна оставлять клиента без ответа
+                    traceback.print_exc()
+                    status, payload, headers = 500, {"error": "Внутренняя ошибка сервера"}, {"connection": "close"}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_websocket(self, reader, writer, headers):
+        """Сессия ученика поверх WebSocket: сообщения JSON с полем action"""
+        key = headers.get("sec-websocket-key")
+        if not key:
+            raise HttpError(400, "Нет заголовка Sec-WebSocket-Key")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("latin-1")).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        await writer.drain()
+
+        async def send(message):
+            writer.write(encode_frame(json.dumps(message, ensure_ascii=False)))
+            await writer.drain()
+
+        session_id = None
+        try:
+            while True:
+                try:
+                    opcode, payload = await read_frame(reader)
+                except HttpError:
+                    writer.write(encode_frame(struct.pack("!H", 1009), 0x8))
+                    await writer.drain()
+                    break
+                if opcode == 0x8:
+                    writer.write(encode_frame(b"", 0x8))
+                    await writer.drain()
+                    break
+                if opcode == 0x9:
+                    writer.write(encode_frame(payload, 0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                try:
+                    message = json.loads(payload.decode("utf-8"))
+                    action = message.get("action")
+                    if action == "start":
+                        reply = await self.start_session(string_field(message, "name").strip())
+                        session_id = reply["session_id"]
+                        self.listeners[session_id] = send
+                    elif action == "answer":
+                        reply = await self.answer(session_id, string_field(message, "answer"))
+                    elif action == "finish":
+                        reply = await self.finish(session_id)
+                    elif action == "state":
+                        reply = self.get_session(session_id).state()
+                    else:
+                        raise HttpError(400, "Неизвестное действие")
+                except HttpError as e:
+                    reply = {"error": e.message, "status": e.status}
+                except (UnicodeDecodeError, ValueError, AttributeError):
+                    reply = {"error": "Некорректный JSON", "status": 400}
+                await send(reply)
+        finally:
+            if session_id is not None:
+                self.listeners.pop(session_id, None)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Сетевой сервер для проверки знаний учеников")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--duration", type=int, default=60, help="время теста в секундах")
+    parser.add_argument("--questions", type=int, default=0, help="вопросов в варианте (0 — все)")
+    parser.add_argument("--quiz-db", default="quiz.db")
+    parser.add_argument("--results-db", default="results.db")
+    parser.add_argument("--pool-size", type=int, default=8, help="размер пула соединений и потоков")
+    return parser.parse_args(argv)
+
+
+async def serve(args):
+    database = Database(args.quiz_db, pool_size=args.pool_size)
+    results_database = ResultsDatabase(args.results_db, pool_size=args.pool_size)
+    engine = QuizEngine(database, results_database, args.duration, question_count=args.questions)
+    server = QuizServer(engine, args.host, args.port, workers=args.pool_size)
+    await server.start()
+    print(f"Сервер запущен на http://{server.host}:{server.port}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+        database.close()
+        results_database.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,665 @@
+import time
+
+STARTED = time.perf_counter()  # Для --profile-startup: до импорта Qt
+
+import sys
+import random
+import argparse
+from PyQt6.QtWidgets import (
+    QApplication, QMainWindow, QLabel, QVBoxLayout,
+    QWidget, QPushButton, QLineEdit, QMessageBox, QInputDialog, QTableView, QAbstractItemView,
+    QTabWidget, QTableWidget, QTableWidgetItem
+)
+from PyQt6.QtCore import Qt, QTimer, QObject, QEvent
+
+from database import Database, ResultsDatabase, search_expression
+
+# models, answer_index и quiz_engine импортируются в окнах, которые ими пользуются:
+# главному окну они не нужны, а первое обращение к перечислениям Qt (Qt.ItemDataRole
+# и т.п.) само по себе занимает десятки миллисекунд.
+
+
+def show_database_error(message):
+    """Вывод ошибки базы данных в окне сообщения."""
+    QMessageBox.critical(None, "Ошибка", message)
+
+
+GRADE_NAMES = {5: "Отлично", 4: "Хорошо", 3: "Удовлетворительно", 2: "Неудовлетворительно"}
+
+
+def fill_table(table, headers, rows):
+    """Заполнение небольшой таблицы готовыми строками."""
+    table.clear()
+    table.setColumnCount(len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.setRowCount(len(rows))
+    for row_number, row in enumerate(rows):
+        for column, value in enumerate(row):
+            table.setItem(row_number, column, QTableWidgetItem(str(value)))
+    table.resizeColumnsToContents()
+
+
+def create_table_view(model, parent):
+    """Таблица с построчным выделением для модели с постраничной загрузкой."""
+    view = QTableView(parent)
+    view.setModel(model)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+    view.verticalHeader().setVisible(False)
+    view.horizontalHeader().setStretchLastSection(True)
+    return view
+
+
+class QuizApp(QMainWindow):
+    def __init__(self, database, results_database):
+        super().__init__()
+        self.setWindowTitle("Программа для проверки знаний")
+        self.setGeometry(100, 100, 400, 300)
+
+        self.database = database
+        self.results_database = results_database
+        self.test_duration = 60
+        self.question_count = 0  # 0 — все вопросы в случайном порядке
+        self.teacher_window = None  # Создаётся при первом входе учителя и потом переиспользуется
+
+        self.initUI()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        student_button = QPushButton("Ученик")
+        teacher_button = QPushButton("Учитель")
+
+        student_button.clicked.connect(self.name_lastname)
+        teacher_button.clicked.connect(self.ask_password)
+
+        layout.addWidget(student_button)
+        layout.addWidget(teacher_button)
+
+        container = QWidget()
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+
+    def name_lastname(self):
+        """Запрос имени и фамилии ученика"""
+        name, ok = QInputDialog.getText(self, "Имя", "Введите свое имя:")
+        if ok and name:
+            self.show_student_window(name)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Вы не ввели имя.")
+
+    def show_student_window(self, student_name):
+        """Показать окно ученика."""
+        self.student_window = StudentWindow(self.database, self.results_database, self, self.test_duration,
+                                            student_name, self.question_count)
+        self.student_window.show()
+        self.close()
+
+    def ask_password(self):
+        """Запрос пароля для доступа к окну учителя"""
+        password, ok = QInputDialog.getText(self, "Пароль", "Введите пароль:")
+
+        if ok and password == "1":
+            self.show_admin_window()
+        else:
+            QMessageBox.warning(self, "Ошибка", "Неверный пароль.")
+
+    def show_admin_window(self):
+        """Показать окно для учителя."""
+        if self.teacher_window is None:
+            self.teacher_window = Admin(self.database, self)
+        self.teacher_window.show()
+        self.close()
+
+
+class StudentWindow(QWidget):
+    def __init__(self, database, results_database, parent, duration, student_name, question_count=0):
+        from quiz_engine import QuizSession, format_time
+
+        super().__init__()
+        self.database = database
+        self.results_database = results_database
+        self.parent = parent
+        self.student_name = student_name
+        self.quiz_ended = False
+        self.duration = duration
+
+        self.setWindowTitle("Ученик")
+        self.setGeometry(100, 100, 400, 300)
+
+        self.question_label = QLabel(self)
+        self.question_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.question_label.setStyleSheet("font-size: 18px; font-weight: bold;")
+        self.answer_input = QLineEdit(self)
+        self.submit_button = QPushButton("Ответить", self)
+        self.back_button = QPushButton("Назад", self)
+
+        self.correct_answer_counter = QLabel("Правильные ответы: 0", self)
+        self.correct_answer_counter.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self.correct_answer_counter.setStyleSheet("font-size: 16px; font-weight: bold;")
+
+        self.timer_label = QLabel(f"Оставшееся время: {format_time(self.duration)}", self)
+        self.timer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.timer_label.setStyleSheet("font-size: 16px; font-weight: bold;")
+
+        self.initUI()
+
+        seed = random.randrange(2 ** 31)  # По seed учитель может воспроизвести вариант
+        self.session = QuizSession(student_name, self.database.sample_questions(question_count, seed),
+                                   self.duration, seed=seed)
+
+        # Таймер только перерисовывает оставшееся время, срок хранит сессия
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_timer)
+        self.timer.start(1000)
+
+        if self.session.questions:
+            self.load_question()
+        else:
+            QMessageBox.warning(self, "Ошибка", "Нет доступных вопросов для теста!")
+
+    def update_timer(self):
+        from quiz_engine import format_time
+
+        self.timer_label.setText(f"Оставшееся время: {format_time(self.session.remaining_time())}")
+        if self.session.is_expired():
+            self.end_quiz()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+        layout.addWidget(self.correct_answer_counter)
+        layout.addWidget(self.timer_label)
+        layout.addWidget(self.question_label)
+        layout.addWidget(self.answer_input)
+        layout.addWidget(self.submit_button)
+        layout.addWidget(self.back_button)
+        self.submit_button.clicked.connect(self.check_answer)
+        self.back_button.clicked.connect(self.go_back)
+        self.setLayout(layout)
+
+    def load_question(self):
+        """Загрузка следующего вопроса из базы данных со номером вопроса"""
+        question = self.session.current_question()
+        if question is not None:
+            self.question_label.setText(question)  # Текст вопроса с номером
+            self.answer_input.clear()  # Очищаем поле ввода
+        else:
+            self.end_quiz()  # Если вопросы закончились, завершить викторину
+
+    def check_answer(self):
+        """Проверка ответа пользователя"""
+        from quiz_engine import SessionFinished
+
+        answer = self.answer_input.text()
+
+        if answer == '':
+            QMessageBox.information(self, "Ошибка!", 'Вы не ввели ответ ')
+            return
+        if not self.session.questions:
+            return
+        try:
+            result = self.session.check_answer(answer)
+        except SessionFinished:
+            self.end_quiz()
+            return
+
+        if result.correct:
+            self.correct_answer_counter.setText(f"Правильные ответы: {result.score}")
+        else:
+            QMessageBox.warning(self, "Неправильно!", f"Правильный ответ: {result.correct_answer}")
+        self.load_question()
+
+    def end_quiz(self):
+        """Завершение викторины и вывод результата"""
+        from quiz_engine import save_session
+
+        if self.quiz_ended:
+            return
+        self.quiz_ended = True
+        self.timer.stop()
+        grade = self.session.finish()
+        save_session(self.results_database, self.session)
+        QMessageBox.information(self, "Викторина завершена!",
+                                f"Ваш результат: {self.session.score} из {len(self.session.questions)}.\n"
+                                f"Ваша оценка: {grade}.")
+        self.close()
+        self.parent.show()
+
+    def go_back(self):
+        """Возврат к главному окну"""
+        self.parent.show()
+        self.close()
+
+
+class Admin(QWidget):
+    """Окно для учителя с административными правами."""
+
+    def __init__(self, database, parent):
+        super().__init__()
+        self.database = database
+        self.parent = parent
+
+        self.setWindowTitle("Админ")
+        self.setGeometry(100, 100, 400, 300)
+        self.results_window = None  # Окна создаются при первом открытии и переиспользуются
+        self.correct_window = None
+        self.submit_button = QPushButton("Проверить результаты учеников", self)
+        self.delete_button1 = QPushButton("Изменение вопросов", self)
+        self.set_time_button = QPushButton("Установить время теста", self)
+        self.question_count_button = QPushButton("Количество вопросов в тесте", self)
+        self.back_button = QPushButton("Назад", self)
+
+        self.initUI()
+
+    def initUI(self):
+        """Инициализация пользовательского интерфейса окна учителя"""
+        layout = QVBoxLayout()
+        layout.addWidget(self.submit_button)
+        layout.addWidget(self.set_time_button)
+        layout.addWidget(self.question_count_button)
+        layout.addWidget(self.delete_button1)
+        layout.addWidget(self.back_button)
+
+        self.setLayout(layout)
+
+        self.back_button.clicked.connect(self.go_back)
+        self.delete_button1.clicked.connect(self.show_correct_window)
+        self.set_time_button.clicked.connect(self.ask_time)
+        self.question_count_button.clicked.connect(self.ask_question_count)
+        self.submit_button.clicked.connect(self.show_results_window)
+
+    def show_results_window(self):
+        """Показать окно с результатами учеников."""
+        if self.results_window is None:
+            self.results_window = ResultsWindow(self.database, self.parent.results_database, self)
+        else:
+            self.results_window.refresh()
+        self.results_window.show()
+        self.close()
+
+    def go_back(self):
+        """Возврат к главному окну."""
+        self.parent.show()
+        self.close()
+
+    def show_correct_window(self):
+        """Показать окно учителя."""
+        if self.correct_window is None:
+            self.correct_window = TeacherWindow(self.database, self.parent.results_database, self)
+        else:
+            self.correct_window.refresh()
+        self.correct_window.show()
+        self.close()
+
+    def ask_time(self):
+        """Запрос времени для теста у учителя"""
+        time, ok = QInputDialog.getInt(self, "Установить время теста", "Введите время в минутах:", value=1, min=1)
+        if ok:
+            duration = time * 60
+            self.parent.test_duration = duration
+            QMessageBox.information(self, "Успех", f"Время теста установлено на {time} минут(ы).")
+
+    def ask_question_count(self):
+        """Запрос числа случайных вопросов в варианте ученика"""
+        count, ok = QInputDialog.getInt(self, "Количество вопросов", "Сколько вопросов выдавать (0 — все):",
+                                        value=self.parent.question_count, min=0)
+        if ok:
+            self.parent.question_count = count
+            QMessageBox.information(self, "Успех", "Каждый ученик получит " +
+                                    (f"{count} случайных вопросов." if count else "все вопросы в случайном порядке."))
+
+
+class ResultsWindow(QWidget):
+    def __init__(self, database, results_database, parent):
+        from models import KeysetTableModel
+
+        super().__init__()
+        self.database = database
+        self.results_database = results_database
+        self.parent = parent
+        self.loaded_generation = None  # Поколения баз, для которых загружены таблицы
+        self.setWindowTitle("Результаты учеников")
+        self.setGeometry(100, 100, 400, 300)
+        self.results_model = KeysetTableModel(self.results_database.get_results_page, [("Имя", 1), ("Очки", 2)])
+        self.results_list = create_table_view(self.results_model, self)
+        self.students_model = KeysetTableModel(self.results_database.get_student_stats_page,
+                                               [("Имя", 1), ("Попыток", 2), ("Средний балл", 3)])
+        self.students_list = create_table_view(self.students_model, self)
+        self.summary_label = QLabel(self)
+        self.grades_table = QTableWidget(self)
+        self.hardest_table = QTableWidget(self)
+        self.tabs = QTabWidget(self)
+        self.variant_button = QPushButton("Вариант ученика", self)
+        self.back_button = QPushButton("Назад", self)
+        self.clear_button = QPushButton("Очистка", self)
+        self.initUI()
+
+    def initUI(self):
+        """Инициализация пользовательского интерфейса окна с результатами"""
+        results_tab = QWidget()
+        results_layout = QVBoxLayout(results_tab)
+        results_layout.addWidget(QLabel("Результаты учеников:"))
+        results_layout.addWidget(self.results_list)
+        results_layout.addWidget(self.variant_button)
+
+        summary_tab = QWidget()
+        summary_layout = QVBoxLayout(summary_tab)
+        summary_layout.addWidget(self.summary_label)
+        summary_layout.addWidget(QLabel("Оценки:"))
+        summary_layout.addWidget(self.grades_table)
+        summary_layout.addWidget(QLabel("Самые трудные вопросы:"))
+        summary_layout.addWidget(self.hardest_table)
+        summary_layout.addWidget(QLabel("Ученики:"))
+        summary_layout.addWidget(self.students_list)
+
+        self.tabs.addTab(results_tab, "Результаты")
+        self.tabs.addTab(summary_tab, "Сводка")
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.tabs)
+        layout.addWidget(self.back_button)
+        layout.addWidget(self.clear_button)
+        self.setLayout(layout)
+        self.load_results()
+        self.load_summary()
+        self.variant_button.clicked.connect(self.show_variant)
+        self.back_button.clicked.connect(self.go_back)
+        self.clear_button.clicked.connect(self.clear)
+
+    def current_generation(self):
+        return self.results_database.current_generation(), self.database.cache.current_generation()
+
+    def refresh(self):
+        """Перезагрузка таблиц при повторном показе, если данные менялись здесь или в другом процессе"""
+        if self.loaded_generation != self.current_generation():
+            self.load_results()
+            self.load_summary()
+
+    def load_results(self):
+        """Загрузка первой страницы результатов учеников из базы данных"""
+        self.loaded_generation = self.current_generation()
+        self.results_model.reload()
+
+    def load_summary(self):
+        """Загрузка сводки из агрегатных таблиц"""
+        summary = self.results_database.get_summary()
+        if summary is None:
+            return
+        self.summary_label.setText(f"Учеников: {summary['students']}, попыток: {summary['attempts']}, "
+                                   f"средний балл: {summary['average_score']:.2f}")
+        fill_table(self.grades_table, ["Оценка", "Количество"],
+                   [(f"{grade} ({GRADE_NAMES.get(grade, '')})", count) for grade, count in summary["histogram"]])
+        hardest = []
+        for question_id, answers, error_rate, mean_time in summary["hardest"]:
+            question = self.database.get_question(question_id)
+            hardest.append((question[1] if question else f"#{question_id} (удалён)", answers,
+                            f"{error_rate * 100:.0f}%", f"{mean_time:.1f}" if mean_time is not None else "—"))
+        fill_table(self.hardest_table, ["Вопрос", "Ответов", "Ошибок", "Среднее время, с"], hardest)
+        self.students_model.reload()
+
+    def show_variant(self):
+        """Показ вопросов, которые достались выбранному ученику"""
+        selected_rows = self.results_list.selectionModel().selectedRows()
+        if not selected_rows:
+            QMessageBox.warning(self, "Ошибка!", "Пожалуйста, выберите результат.")
+            return
+        variant = self.results_database.get_variant(self.results_model.id_at(selected_rows[0]))
+        if variant is None:
+            QMessageBox.information(self, "Вариант", "Для этого результата вариант не сохранён.")
+            return
+        seed, question_ids = variant
+        questions = {row[0]: row for row in self.database.get_questions_by_ids(question_ids)}
+        lines = [f"{number}. {questions[question_id][1]} — {questions[question_id][2]}"
+                 if question_id in questions else f"{number}. #{question_id} (удалён)"
+                 for number, question_id in enumerate(question_ids, 1)]
+        QMessageBox.information(self, "Вариант", f"Зерно варианта: {seed}\n\n" + "\n".join(lines))
+
+    def clear(self):
+        """Очистка результатов в базе данных и вопросов"""
+        self.results_database.clear_results()
+        self.database.clear_questions()  # Очищаем вопросы и сбрасываем автоинкремент
+        self.results_model.clear()
+        self.students_model.clear()
+        self.loaded_generation = None  # Сводка обновится при следующем показе
+        self.parent.show()
+        self.close()
+
+    def go_back(self):
+        """Возврат к окну администратора"""
+        self.parent.show()
+        self.close()
+
+
+class TeacherWindow(QWidget):
+    """Окно для управления вопросами."""
+
+    def __init__(self, database, results_database, parent):
+        from models import KeysetTableModel
+
+        super().__init__()
+        self.database = database
+        self.results_database = results_database
+        self.parent = parent
+        self.loaded_generation = None  # Поколение банка вопросов, показанное в таблице
+
+        self.setWindowTitle("Учитель")
+        self.setGeometry(100, 100, 400, 300)
+
+        self.question_input = QLineEdit(self)
+        self.answer_input = QLineEdit(self)
+        self.submit_button = QPushButton("Добавить вопрос", self)
+        self.delete_button = QPushButton("Удалить вопрос", self)
+        self.edit_answer_button = QPushButton("Изменить ответ", self)
+        self.delete_all_button = QPushButton("Удалить все вопросы", self)  # Новая кнопка
+        self.back_button = QPushButton("Назад", self)
+        self.search_input = QLineEdit(self)
+        self.search_input.setPlaceholderText("Поиск по словам или их началам")
+        self.search_timer = QTimer(self)  # Поиск запускается после паузы в наборе
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.question_model = KeysetTableModel(self.database.get_questions_page, [("ID", 0), ("Вопрос", 1)])
+        self.question_list = create_table_view(self.question_model, self)
+
+        self.initUI()
+
+        # Загрузка вопросов из базы данных
+        self.load_questions()
+
+    def initUI(self):
+        """Инициализация пользовательского интерфейса окна учителя"""
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Введите вопрос:"))
+        layout.addWidget(self.question_input)
+        layout.addWidget(QLabel("Введите правильный ответ (несколько вариантов через |):"))
+        layout.addWidget(self.answer_input)
+        layout.addWidget(self.submit_button)
+        layout.addWidget(QLabel("Список вопросов:"))
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.question_list)
+        layout.addWidget(self.delete_button)
+        layout.addWidget(self.edit_answer_button)
+        layout.addWidget(self.delete_all_button)  # Добавление новой кнопки удаления всех вопросов
+        layout.addWidget(self.back_button)
+
+        self.submit_button.clicked.connect(self.add_question)
+        self.delete_button.clicked.connect(self.delete_question)
+        self.edit_answer_button.clicked.connect(self.edit_answer_key)
+        self.delete_all_button.clicked.connect(self.delete_all_questions)  # Подключение к новой функции
+        self.back_button.clicked.connect(self.go_back)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self.search_questions)
+
+        self.setLayout(layout)
+
+    def refresh(self):
+        """Обновление списка при повторном показе, если вопросы менялись в другом окне или процессе"""
+        if self.loaded_generation != self.database.cache.current_generation():
+            self.search_questions()
+
+    def search_questions(self):
+        """Показ найденных вопросов или, пока в запросе нет слов от двух букв, всего списка"""
+        text = self.search_input.text().strip()
+        if not search_expression(text):
+            self.load_questions()
+            return
+        self.loaded_generation = self.database.cache.current_generation()
+        self.question_model.set_rows(self.database.search_questions(text))
+
+    def delete_all_questions(self):
+        """Удаление всех вопросов из базы данных."""
+        try:
+            self.database.delete_all_questions()  # Вызов метода удаления всех вопросов
+            QMessageBox.information(self, "Успех!", "Все вопросы успешно удалены!")
+            self.question_model.clear()  # Обновляем список вопросов
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка!", f"Не удалось удалить все вопросы: {str(e)}")
+
+    def load_questions(self):
+        """Загрузка первой страницы вопросов из базы данных в таблицу"""
+        self.loaded_generation = self.database.cache.current_generation()
+        try:
+            self.question_model.reload()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка!", f"Не удалось загрузить вопросы: {str(e)}")
+
+    def add_question(self):
+        """Добавление вопроса в базу данных."""
+        question = self.question_input.text()
+        answer = self.answer_input.text()
+
+        if question and answer:
+            try:
+                if not self.database.insert_question(question, answer):
+                    return  # Такой вопрос уже есть: сообщение показал обработчик ошибок базы данных
+                QMessageBox.information(self, "Успех!", "Вопрос добавлен!")
+                self.question_input.clear()
+                self.answer_input.clear()
+                if self.question_model.keyset:
+                    self.question_model.fetch_new()  # Подгружаем только новые вопросы
+                else:
+                    self.search_questions()
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка!", f"Не удалось добавить вопрос: {str(e)}")
+        else:
+            QMessageBox.warning(self, "Ошибка!", "Пожалуйста, заполните оба поля.")
+
+    def delete_question(self):
+        """Удаление выбранного вопроса из базы данных"""
+        selected_rows = self.question_list.selectionModel().selectedRows()
+        if selected_rows:
+            question_id = self.question_model.id_at(selected_rows[0])  # ID хранится в данных строки
+            try:
+                self.database.delete_question(question_id)
+                QMessageBox.information(self, "Успех!", "Вопрос успешно удален!")
+                self.question_model.remove_id(question_id)  # Убираем строку из таблицы
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка!", f"Не удалось удалить вопрос: {str(e)}")
+        else:
+            QMessageBox.warning(self, "Ошибка!", "Пожалуйста, выберите вопрос для удаления.")
+
+    def edit_answer_key(self):
+        """Изменение правильного ответа выбранного вопроса и пересчёт сохранённых ответов"""
+        from answer_index import AnswerKey
+
+        selected_rows = self.question_list.selectionModel().selectedRows()
+        if not selected_rows:
+            QMessageBox.warning(self, "Ошибка!", "Пожалуйста, выберите вопрос.")
+            return
+        question = self.database.get_question(self.question_model.id_at(selected_rows[0]))
+        if question is None:
+            return
+        question_id, _, correct_answer, tolerance = question
+
+        answer, ok = QInputDialog.getText(self, "Изменить ответ", "Правильные ответы (через |):", text=correct_answer)
+        if not ok or not answer.strip():
+            return
+        tolerance, ok = QInputDialog.getInt(self, "Изменить ответ", "Допустимое число опечаток:",
+                                            value=tolerance, min=0, max=3)
+        if not ok:
+            return
+        if not self.database.update_answer_key(question_id, answer, tolerance):
+            return  # Причину уже показал обработчик ошибок базы данных
+        changed = self.results_database.regrade_question(question_id, AnswerKey(answer, tolerance))
+        QMessageBox.information(self, "Успех!", f"Ответ изменён. Пересчитано ответов: {changed}")
+
+    def go_back(self):
+        """Возврат к главному окну."""
+        self.parent.show()  # Показываем родительское окно (главное окно)
+        self.close()
+
+
+def install_instrumentation():
+    """Замер методов баз данных и слотов окон для --metrics; возвращает реестр метрик.
+
+    Время слотов, которые показывают окно сообщения (например, check_answer при
+    неверном ответе), включает и время, пока окно открыто.
+    """
+    import instrumentation
+
+    instrumentation.install()
+    instrumentation.instrument(QuizApp, ["show_student_window", "show_admin_window"], slots=True)
+    instrumentation.instrument(StudentWindow, ["check_answer", "load_question"], slots=True)
+    instrumentation.instrument(Admin, ["show_results_window", "show_correct_window"], slots=True)
+    instrumentation.instrument(ResultsWindow, ["load_results", "load_summary"], slots=True)
+    instrumentation.instrument(TeacherWindow, ["load_questions", "search_questions"], slots=True)
+    return instrumentation.metrics
+
+
+class StartupProfiler(QObject):
+    """Замер запуска для --profile-startup: импорт, открытие баз и первая отрисовка окна."""
+
+    def __init__(self, started):
+        super().__init__()
+        self.marks = [("", started)]
+
+    def mark(self, title):
+        self.marks.append((title, time.perf_counter()))
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint:
+            watched.removeEventFilter(self)
+            self.mark("Первая отрисовка")
+            self.report()
+            QTimer.singleShot(0, QApplication.quit)
+        return False
+
+    def report(self):
+        for (_, previous), (title, moment) in zip(self.marks, self.marks[1:]):
+            print(f"{title}: {(moment - previous) * 1000:.1f} мс", file=sys.stderr)
+        print(f"Всего до первой отрисовки: {(self.marks[-1][1] - self.marks[0][1]) * 1000:.1f} мс", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Программа для проверки знаний")
+    parser.add_argument("--db", help="хранить вопросы и результаты в одном файле")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="вывести время импорта, открытия баз и первой отрисовки и выйти")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="замерять вызовы баз данных и слотов окон и при выходе сохранить метрики в JSON")
+    return parser.parse_known_args(argv)  # Остальные аргументы остаются для Qt
+
+
+if __name__ == '__main__':
+    args, qt_args = parse_args(sys.argv[1:])
+    profiler = StartupProfiler(STARTED) if args.profile_startup else None
+    if profiler:
+        profiler.mark("Импорт модулей")
+    app = QApplication(sys.argv[:1] + qt_args)
+    if profiler:
+        profiler.mark("Создание QApplication")
+    metrics = install_instrumentation() if args.metrics else None
+    database = Database(args.db or "quiz.db", error_handler=show_database_error)
+    results_database = ResultsDatabase(args.db or "results.db", error_handler=show_database_error)
+    if profiler:
+        profiler.mark("Открытие баз данных")
+    quiz_app = QuizApp(database, results_database)
+    if profiler:
+        profiler.mark("Создание главного окна")
+        quiz_app.installEventFilter(profiler)
+    quiz_app.show()
+    exit_code = app.exec()
+    database.close()  # Дописываем отложенные вставки перед выходом
+    results_database.close()
+    if metrics is not None:
+        metrics.save(args.metrics)
+    sys.exit(exit_code)